@@ -5,21 +5,41 @@
 # ui_style: minimal-inline
 # version: 0.1.0
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, session, flash, stream_with_context
 from core.config import Config
-from core.db import init_db, get_db_connection
-from core.auth import require_auth
-from core.utils import update_env_variable
+from core.db import init_db, ensure_schema, init_app as init_db_app, get_db_connection, rebuild_counters, verify_counters, schema_version, migration_title
+from core.auth import require_auth, rate_limit
+from core.utils import update_env_variable, highlight_snippet
+from core.cache import data_cache, bump_data_version
+from core.profiling import init_app as init_profiling, profiling_snapshot, reset_profiling
 from services.data_service import DataService
-from services.import_service import ImportService
+from services.import_service import start_import_job, get_import_job
+from services.extraction_service import ExtractionService
+from services.similarity_service import SimilarityService
+import click
+import csv
+import io
+import json
 import os
 
 # Configurar Flask com diretório de templates correto
 app = Flask(__name__, template_folder='ui/templates')
 app.config.from_object(Config)
+app.jinja_env.filters['highlight'] = highlight_snippet
 
-# Inicializar banco
-init_db()
+# Conexões do banco por requisição
+init_db_app(app)
+
+# Tempo de SQL por requisição, Server-Timing e histogramas por rota
+init_profiling(app)
+
+def create_app():
+    """Preparar a aplicação para servir: cria/migra o schema e retorna o app WSGI
+    
+    Opcional: sem ela o schema é preparado antes da primeira requisição.
+    """
+    ensure_schema()
+    return app
 
 @app.route('/')
 @require_auth
@@ -32,6 +52,7 @@ def dashboard():
     return render_template('dashboard.html', stats=stats, recent_items=recent_items, categories=categories)
 
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', methods=('POST',))
 def login():
     """Login simples"""
     if request.method == 'POST':
@@ -53,9 +74,15 @@ def logout():
 def category_view(category_name):
     """Visualizar categoria específica"""
     data_service = DataService()
-    items = data_service.get_items_by_category(category_name)
+    page = data_service.get_items_by_category(
+        category_name,
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
     categories = data_service.get_categories()
-    return render_template('category.html', category_name=category_name, items=items, categories=categories)
+    total = next((c['count'] for c in categories if c['name'] == category_name), 0)
+    return render_template('category.html', category_name=category_name, items=page['items'],
+                           page=page, total=total, categories=categories)
 
 @app.route('/search')
 @require_auth
@@ -63,9 +90,51 @@ def search():
     """Busca global"""
     query = request.args.get('q', '')
     data_service = DataService()
-    results = data_service.search_items(query) if query else []
+    page = None
+    results = []
+    if query:
+        page = data_service.search_items(
+            query,
+            after=request.args.get('after'),
+            before=request.args.get('before')
+        )
+        results = page['items']
     categories = data_service.get_categories()
-    return render_template('search.html', query=query, results=results, categories=categories)
+    return render_template('search.html', query=query, results=results, page=page, categories=categories)
+
+@app.route('/reports/password-reuse')
+@require_auth
+def password_reuse():
+    """Senhas usadas em mais de um item"""
+    page = DataService().get_password_reuse(
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    return render_template('password_reuse.html', page=page)
+
+@app.route('/values/<int:value_id>')
+@require_auth
+def value_items(value_id):
+    """Itens que contêm um valor extraído (senha, email, URL, chave ou seed)"""
+    page = DataService().get_value_items(
+        value_id,
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    if page is None:
+        flash('Valor não encontrado')
+        return redirect(url_for('dashboard'))
+    return render_template('value_items.html', page=page, value_id=value_id)
+
+@app.route('/reports/similar')
+@require_auth
+def similar_groups():
+    """Grupos de itens parecidos para revisão e remoção em lote"""
+    page = DataService().get_similar_groups(
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    return render_template('similar_groups.html', page=page)
 
 @app.route('/import-data', methods=['GET', 'POST'])
 @require_auth
@@ -80,25 +149,42 @@ def import_data():
         flash('Você deve confirmar ambas as opções para prosseguir com a importação')
         return render_template('import.html')
     
-    import_service = ImportService()
     json_path = os.path.join(os.path.dirname(__file__), '..', 'dados_organizados.json')
     
     try:
-        result = import_service.import_from_json(json_path)
-        flash(f'✅ Dados importados com sucesso: {result["imported"]} itens', 'success')
+        job_id = start_import_job(json_path)
     except Exception as e:
         flash(f'❌ Erro na importação: {str(e)}', 'error')
+        return redirect(url_for('dashboard'))
     
-    return redirect(url_for('dashboard'))
+    # A importação segue em segundo plano; a página acompanha o progresso
+    return render_template('import.html', job_id=job_id)
+
+@app.route('/api/import/<job_id>')
+@require_auth
+def api_import_status(job_id):
+    """API com o progresso de uma importação em segundo plano"""
+    job = get_import_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job)
 
 @app.route('/remove-duplicates', methods=['POST'])
 @require_auth
 def remove_duplicates():
     """Remove dados duplicados do banco"""
+    dry_run = bool(request.form.get('dry_run'))
+    data_service = DataService()
+    
     try:
-        from remove_duplicates import remove_duplicates as remove_dups_func
-        remove_dups_func()
-        flash('✅ Duplicados removidos com sucesso!', 'success')
+        result = data_service.remove_duplicates(dry_run=dry_run)
+        if dry_run:
+            flash(f'🔎 Simulação: {result["items_removed"]} itens duplicados em {result["groups"]} grupos '
+                  f'seriam removidos ({result["children_moved"]} dados extraídos realocados, '
+                  f'{result["children_removed"]} valores repetidos descartados)', 'success')
+        else:
+            flash(f'✅ Duplicados removidos com sucesso: {result["items_removed"]} itens em {result["groups"]} grupos '
+                  f'({result["children_removed"]} valores repetidos descartados)', 'success')
     except Exception as e:
         flash(f'❌ Erro ao remover duplicados: {str(e)}', 'error')
     
@@ -113,7 +199,8 @@ def view_item(item_id):
     if not item:
         flash('Item não encontrado')
         return redirect(url_for('dashboard'))
-    return render_template('item_detail.html', item=item)
+    similar = data_service.get_similar_items(item_id)
+    return render_template('item_detail.html', item=item, similar=similar)
 
 @app.route('/item/<int:item_id>/edit', methods=['GET', 'POST'])
 @require_auth
@@ -181,11 +268,8 @@ def bulk_delete():
         return_url = request.form.get('return_url') or request.referrer or url_for('dashboard')
         return redirect(return_url)
     
-    # Deletar itens em lote
-    deleted_count = 0
-    for item_id in valid_ids:
-        if data_service.delete_item(item_id):
-            deleted_count += 1
+    # Deletar itens em lote (uma única transação)
+    deleted_count = data_service.delete_items(valid_ids)
     
     if deleted_count > 0:
         if deleted_count == 1:
@@ -230,11 +314,8 @@ def bulk_move_category():
         return_url = request.form.get('return_url') or request.referrer or url_for('dashboard')
         return redirect(return_url)
     
-    # Mover itens em lote
-    moved_count = 0
-    for item_id in valid_ids:
-        if data_service.update_item_category(item_id, new_category):
-            moved_count += 1
+    # Mover itens em lote (uma única transação)
+    moved_count = data_service.move_items(valid_ids, new_category)
     
     if moved_count > 0:
         if moved_count == 1:
@@ -304,6 +385,100 @@ def api_stats():
     stats = data_service.get_dashboard_stats()
     return jsonify(stats)
 
+def api_item(item):
+    """Item no formato da API (sem os marcadores de destaque da busca)"""
+    item = dict(item)
+    item.pop('snippet', None)
+    return item
+
+@app.route('/api/items')
+@require_auth
+def api_items():
+    """API de itens com filtro por categoria/busca e paginação por cursor"""
+    category = request.args.get('category') or None
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', Config.PAGE_SIZE)), 1), Config.API_MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'limit inválido'}), 400
+    
+    data_service = DataService()
+    after = request.args.get('after')
+    before = request.args.get('before')
+    if query:
+        page = data_service.search_items(query, after, before, limit, category_name=category, with_related=True)
+    else:
+        page = data_service.list_items(category, after, before, limit, with_related=True)
+    
+    return jsonify({
+        'items': [api_item(item) for item in page['items']],
+        'next_cursor': page['next_cursor'],
+        'prev_cursor': page['prev_cursor']
+    })
+
+# Colunas do export CSV; listas de dados extraídos vão separadas por quebra de linha
+EXPORT_CSV_COLUMNS = [
+    'id', 'category_name', 'source_file', 'created_at', 'raw_content',
+    'passwords', 'emails', 'urls', 'private_keys', 'seeds'
+]
+
+@app.route('/api/export')
+@require_auth
+def api_export():
+    """Exportar itens (NDJSON ou CSV) em streaming, com memória constante"""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Formato deve ser ndjson ou csv'}), 400
+    
+    category = request.args.get('category') or None
+    query = request.args.get('q', '').strip() or None
+    items = DataService().iter_items(category, query, Config.EXPORT_CHUNK_SIZE)
+    
+    def generate_ndjson():
+        for item in items:
+            yield json.dumps(api_item(item), ensure_ascii=False) + '\n'
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_COLUMNS)
+        for count, item in enumerate(items, 1):
+            writer.writerow([
+                '\n'.join(item[column]) if isinstance(item[column], list) else item[column]
+                for column in EXPORT_CSV_COLUMNS
+            ])
+            # Enviar em blocos para não acumular o arquivo inteiro
+            if count % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    if export_format == 'csv':
+        generator, mimetype = generate_csv(), 'text/csv'
+    else:
+        generator, mimetype = generate_ndjson(), 'application/x-ndjson'
+    
+    return Response(
+        stream_with_context(generator),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=atlas-export.{export_format}'}
+    )
+
+@app.route('/api/cache')
+@require_auth
+def api_cache():
+    """API com os contadores do cache de leitura"""
+    return jsonify(data_cache.stats())
+
+@app.route('/api/profiling', methods=['GET', 'DELETE'])
+@require_auth
+def api_profiling():
+    """Latência por rota e consultas lentas deste processo (DELETE zera os dados)"""
+    if request.method == 'DELETE':
+        reset_profiling()
+    return jsonify(profiling_snapshot())
+
 @app.route('/donate')
 @require_auth
 def donate():
@@ -349,5 +524,84 @@ def change_password():
     
     return render_template('change_password.html')
 
+@app.cli.command('rebuild-stats')
+@click.option('--verify', is_flag=True, help='Apenas comparar os contadores com as contagens reais')
+def rebuild_stats_command(verify):
+    """Verificar ou recalcular os contadores do dashboard"""
+    init_db()
+    conn = get_db_connection()
+    try:
+        mismatches = verify_counters(conn)
+        for mismatch in mismatches:
+            click.echo(f"{mismatch['counter']}: armazenado={mismatch['stored']} real={mismatch['actual']}")
+        if verify:
+            click.echo('Contadores corretos' if not mismatches else f'{len(mismatches)} contadores divergentes')
+            return
+        rebuild_counters(conn)
+        bump_data_version(conn)
+        conn.commit()
+        click.echo('Contadores recalculados')
+    finally:
+        conn.close()
+
+@app.cli.command('migrate')
+@click.option('--status', is_flag=True, help='Apenas mostrar a versão do schema')
+def migrate_command(status):
+    """Aplicar migrações pendentes do banco"""
+    if not status:
+        applied = init_db()
+        for version in applied:
+            click.echo(f'Migração {version} aplicada: {migration_title(version)}')
+        if not applied:
+            click.echo('Nenhuma migração pendente')
+    conn = get_db_connection()
+    try:
+        current, latest = schema_version(conn)
+        click.echo(f'Schema na versão {current} (mais recente: {latest})')
+    finally:
+        conn.close()
+
+@app.cli.command('extract')
+@click.option('--all', 'all_items', is_flag=True, help='Reprocessar todos os itens sem dados do import, não só os sem dados extraídos')
+@click.option('--workers', type=int, default=None, help='Processos de extração (padrão: número de CPUs)')
+@click.option('--batch-size', type=int, default=None, help='Itens por bloco')
+def extract_command(all_items, workers, batch_size):
+    """Extrair senhas, emails, URLs, chaves e seeds do conteúdo dos itens"""
+    init_db()
+    
+    def progress(items, rows):
+        click.echo(f'{items} itens processados, {rows} valores gravados')
+    
+    service = ExtractionService(batch_size, workers)
+    totals = service.backfill(only_missing=not all_items, progress=progress)
+    click.echo(f"Concluído: {totals['items']} itens em {totals['seconds']}s ({totals['items_per_second']} itens/s)")
+
+@app.cli.command('similarity')
+@click.option('--all', 'all_items', is_flag=True, help='Recalcular todas as assinaturas, não só as que faltam')
+@click.option('--batch-size', type=int, default=None, help='Itens por bloco')
+def similarity_command(all_items, batch_size):
+    """Gerar assinaturas MinHash dos itens e agrupar os itens parecidos"""
+    init_db()
+    
+    def progress(items):
+        click.echo(f'{items} itens processados')
+    
+    service = SimilarityService(batch_size)
+    totals = service.backfill(only_missing=not all_items, progress=progress)
+    click.echo(f"Assinaturas: {totals['items']} itens em {totals['seconds']}s ({totals['items_per_second']} itens/s)")
+    groups = service.rebuild_groups()
+    click.echo(f"Grupos: {groups['groups']} com {groups['items']} itens parecidos")
+
+@app.cli.command('serve')
+@click.option('--host', default=Config.HOST, show_default=True)
+@click.option('--port', default=Config.PORT, type=int, show_default=True)
+@click.option('--workers', default=Config.WORKERS, type=int, show_default=True, help='Processos do servidor')
+@click.option('--threads', default=Config.THREADS, type=int, show_default=True, help='Threads por processo')
+def serve_command(host, port, workers, threads):
+    """Servir a aplicação em modo produção"""
+    from core.server import serve
+    serve(app, host, port, workers, threads)
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app()
+    app.run(debug=Config.DEBUG, host=Config.HOST, port=Config.PORT)
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""Gerar arquivos dados_organizados.json sintéticos para benchmarks
+
+Uso: python -m benchmarks.generate_data --items 100000 --output dados_organizados.json
+
+O arquivo é escrito em streaming (um item por vez), então dá para gerar
+milhões de itens sem carregar tudo em memória. Com a mesma seed o
+resultado é sempre o mesmo.
+"""
+import argparse
+import json
+import random
+
+# Categorias e peso relativo de cada uma
+CATEGORIES = [
+    ('email_accounts', 30),
+    ('social_media', 20),
+    ('banking', 10),
+    ('crypto_wallets', 8),
+    ('streaming', 12),
+    ('work', 15),
+    ('misc', 5),
+]
+
+DOMAINS = [
+    'gmail.com', 'hotmail.com', 'outlook.com', 'yahoo.com.br', 'uol.com.br',
+    'bol.com.br', 'icloud.com', 'protonmail.com', 'empresa.com.br', 'terra.com.br',
+]
+
+SITES = [
+    'accounts.google.com', 'login.live.com', 'www.facebook.com', 'www.instagram.com',
+    'twitter.com', 'www.netflix.com', 'www.linkedin.com', 'github.com',
+    'internetbanking.caixa.gov.br', 'www.itau.com.br', 'app.nubank.com.br',
+    'www.binance.com', 'metamask.io', 'discord.com', 'www.mercadolivre.com.br',
+    'portal.empresa.com.br', 'mail.empresa.com.br', 'www.amazon.com.br',
+]
+
+NAMES = [
+    'ana', 'bruno', 'carla', 'daniel', 'eduarda', 'felipe', 'gabriela', 'henrique',
+    'isabela', 'joao', 'larissa', 'marcos', 'natalia', 'otavio', 'paula', 'rafael',
+    'sofia', 'thiago', 'vanessa', 'wagner',
+]
+
+# Amostra da lista BIP39 (suficiente para frases com aparência realista)
+SEED_WORDS = [
+    'abandon', 'ability', 'able', 'about', 'above', 'absent', 'absorb', 'abstract',
+    'absurd', 'abuse', 'access', 'accident', 'account', 'accuse', 'achieve', 'acid',
+    'acoustic', 'acquire', 'across', 'act', 'action', 'actor', 'actress', 'actual',
+    'adapt', 'add', 'addict', 'address', 'adjust', 'admit', 'adult', 'advance',
+    'advice', 'aerobic', 'affair', 'afford', 'afraid', 'again', 'age', 'agent',
+    'agree', 'ahead', 'aim', 'air', 'airport', 'aisle', 'alarm', 'album',
+    'zebra', 'zero', 'zone', 'zoo', 'youth', 'yellow', 'year', 'wrist',
+]
+
+FILLER = [
+    'Conta principal', 'Backup antigo', 'Senha alterada em 2021', 'Usar autenticação em duas etapas',
+    'Login do trabalho', 'Conta compartilhada', 'Não usar no celular', 'Recuperação por SMS',
+    'Cartão final 4321', 'Perguntas de segurança: cidade natal', 'Exportado do navegador',
+]
+
+def _password(rng):
+    # Senhas repetidas são comuns: parte vem de um conjunto pequeno
+    if rng.random() < 0.3:
+        return rng.choice(['123456', 'senha123', 'qwerty', 'brasil2020', 'Mudar@123', 'admin'])
+    base = rng.choice(NAMES).capitalize() + str(rng.randint(1, 9999))
+    return base + rng.choice(['', '!', '@', '#', '$'])
+
+def make_item(rng, index):
+    """Um item no formato do export (source_file, raw_content, extracted_info)"""
+    name = rng.choice(NAMES)
+    emails = [f'{name}.{index}@{rng.choice(DOMAINS)}' for _ in range(rng.choice([1, 1, 1, 2, 3]))]
+    urls = [f'https://{site}/login' for site in rng.sample(SITES, rng.choice([1, 1, 2, 3]))]
+    passwords = [_password(rng) for _ in range(rng.choice([1, 1, 2]))]
+    private_keys = []
+    seeds = []
+    if rng.random() < 0.08:
+        private_keys.append('%064x' % rng.getrandbits(256))
+    if rng.random() < 0.05:
+        seeds.append(' '.join(rng.choice(SEED_WORDS) for _ in range(rng.choice([12, 24]))))
+    
+    lines = []
+    for url, email, password in zip(urls, emails * 3, passwords * 3):
+        lines += [f'URL: {url}', f'Usuário: {email}', f'Senha: {password}', '']
+    for key in private_keys:
+        lines.append(f'Chave privada: {key}')
+    for seed in seeds:
+        lines.append(f'Seed: {seed}')
+    lines += rng.sample(FILLER, rng.randint(0, 3))
+    # Alguns itens têm notas longas (exportações de navegador, logs)
+    if rng.random() < 0.1:
+        lines += [' '.join(rng.choice(FILLER).split()) for _ in range(rng.randint(20, 200))]
+    
+    return {
+        'source_file': f'export_{index // 1000:04d}/{name}_{index}.txt',
+        'raw_content': '\n'.join(lines),
+        'extracted_info': {
+            'possible_passwords': passwords,
+            'emails': emails,
+            'urls': urls,
+            'possible_private_keys': private_keys,
+            'possible_seed': seeds,
+        },
+    }
+
+def generate(path, items, seed=42, duplicate_ratio=0.02):
+    """Escrever arquivo com items itens; duplicate_ratio repete itens já gerados
+    
+    Retorna a quantidade de itens por categoria.
+    """
+    rng = random.Random(seed)
+    names = [name for name, _ in CATEGORIES]
+    weights = [weight for _, weight in CATEGORIES]
+    
+    # Distribuir itens por categoria antes de escrever (o JSON agrupa por categoria)
+    counts = dict.fromkeys(names, 0)
+    for name in rng.choices(names, weights, k=items):
+        counts[name] += 1
+    
+    index = 0
+    recent = []
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"categories": {')
+        for position, name in enumerate(names):
+            if position:
+                f.write(', ')
+            f.write(json.dumps(name) + ': [')
+            for i in range(counts[name]):
+                if recent and rng.random() < duplicate_ratio:
+                    item = rng.choice(recent)
+                else:
+                    item = make_item(rng, index)
+                    index += 1
+                    recent = (recent + [item])[-100:]
+                if i:
+                    f.write(', ')
+                f.write(json.dumps(item, ensure_ascii=False))
+            f.write(']')
+            recent = []
+        f.write('}}')
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerar dados_organizados.json sintético')
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--output', default='dados_organizados.json')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--duplicates', type=float, default=0.02, help='Fração de itens repetidos')
+    args = parser.parse_args()
+    
+    counts = generate(args.output, args.items, args.seed, args.duplicates)
+    print(f'{args.items} itens gravados em {args.output}: {counts}')
+
+if __name__ == '__main__':
+    main()
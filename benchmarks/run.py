@@ -0,0 +1,296 @@
+"""Benchmark da importação, do DataService e das rotas principais
+
+Uso: python -m benchmarks.run --items 10000 [--repeat 30] [--output resultado.json]
+     python -m benchmarks.run --items 100000 --baseline resultado_anterior.json
+
+Cada execução usa um banco novo em um diretório temporário. Para cada
+operação são registrados p50/p95/máximo, operações por segundo e o pico de
+memória Python (tracemalloc, medido em uma chamada extra para não distorcer
+os tempos). O resultado vai para um JSON que pode ser comparado entre
+commits com --baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from benchmarks.generate_data import generate
+
+def percentile(values, fraction):
+    """Percentil por posição mais próxima (valores já ordenados)"""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+def peak_rss_kb():
+    """Pico de memória residente do processo (KB), quando disponível"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS informa em bytes, Linux em KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(fn, repeat, setup=None):
+    """Executar fn repeat vezes (após um aquecimento) e resumir os tempos"""
+    if setup:
+        setup()
+    fn()
+    
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    timings.sort()
+    total = sum(timings)
+    return {
+        'runs': repeat,
+        'mean_ms': round(total / repeat, 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'max_ms': round(timings[-1], 3),
+        'ops_per_s': round(repeat / (total / 1000), 1) if total else None,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+def run(args, workdir):
+    data_path = args.data
+    results = {'meta': {}, 'import': {}, 'service': {}, 'routes': {}}
+    
+    if not data_path:
+        data_path = os.path.join(workdir, 'dados_organizados.json')
+        start = time.perf_counter()
+        generate(data_path, args.items, args.seed)
+        print(f'Dados gerados em {time.perf_counter() - start:.1f}s ({data_path})')
+    
+    # O caminho do banco é lido pela Config na importação do app
+    db_path = os.path.join(workdir, 'bench.db')
+    os.environ['DATABASE_PATH'] = db_path
+    os.environ['PROFILING_ENABLED'] = 'True' if args.profiling else 'False'
+    os.environ['DEBUG'] = 'False'
+    
+    import app as app_module
+    from core.cache import data_cache
+    from services.data_service import DataService
+    from services.import_service import ImportService
+    
+    app = app_module.app
+    app.config['RATE_LIMIT_ENABLED'] = False
+    app_module.create_app()
+    
+    # Importação (uma vez: a segunda passada mede o caminho idempotente)
+    rss_before = peak_rss_kb()
+    start = time.perf_counter()
+    summary = ImportService().import_from_json(data_path)
+    elapsed = time.perf_counter() - start
+    rss_after = peak_rss_kb()
+    results['import']['first'] = {
+        'seconds': round(elapsed, 3),
+        'items_per_s': round(summary['imported'] / elapsed, 1) if elapsed else None,
+        'imported': summary['imported'],
+        'skipped': summary['skipped'],
+        'peak_rss_kb': rss_after,
+        'peak_rss_growth_kb': rss_after - rss_before if rss_before is not None else None,
+    }
+    start = time.perf_counter()
+    summary = ImportService().import_from_json(data_path)
+    elapsed = time.perf_counter() - start
+    results['import']['reimport'] = {
+        'seconds': round(elapsed, 3),
+        'items_per_s': round(summary['skipped'] / elapsed, 1) if elapsed else None,
+        'skipped': summary['skipped'],
+    }
+    print(f"Importação: {results['import']['first']['seconds']}s, "
+          f"reimportação: {results['import']['reimport']['seconds']}s")
+    
+    service = DataService()
+    with app.app_context():
+        categories = service.get_categories()
+        category = max(categories, key=lambda c: c['count'])['name']
+        first_page = service.get_items_by_category(category)
+        item_ids = [item['id'] for item in first_page['items']]
+    item_id = item_ids[len(item_ids) // 2]
+    
+    def in_context(fn):
+        def wrapper():
+            with app.app_context():
+                fn()
+        return wrapper
+    
+    service_ops = {
+        'get_dashboard_stats (sem cache)': service._load_dashboard_stats,
+        'get_dashboard_stats (cache)': service.get_dashboard_stats,
+        'get_recent_items': lambda: service._load_recent_items(10),
+        'get_categories': service._load_categories,
+        'get_items_by_category (1a página)': lambda: service.get_items_by_category(category),
+        'get_items_by_category (2a página)': lambda: service.get_items_by_category(
+            category, after=first_page['next_cursor']),
+        'list_items (500, com relacionados)': lambda: service.list_items(limit=500, with_related=True),
+        'search_items (texto)': lambda: service.search_items('login'),
+        'search_items (email:)': lambda: service.search_items('email:ana'),
+        'get_item_by_id': lambda: service.get_item_by_id(item_id),
+        'remove_duplicates (dry_run)': lambda: service.remove_duplicates(dry_run=True),
+    }
+    for name, fn in service_ops.items():
+        if name.startswith('remove_duplicates') and args.items > 200000 and not args.full:
+            continue
+        # Só a versão "cache" deve encontrar o cache preenchido
+        setup = None if '(cache)' in name else data_cache.clear
+        repeat = max(3, args.repeat // 5) if name.startswith('remove_duplicates') else args.repeat
+        results['service'][name] = measure(in_context(fn), repeat, setup)
+        print(f"{name}: p50 {results['service'][name]['p50_ms']} ms")
+    
+    # Escritas: criar, editar e remover um item
+    created = []
+    def create():
+        with app.app_context():
+            service.create_item({
+                'category_name': category,
+                'source_file': f'bench/novo_{len(created)}.txt',
+                'raw_content': f'URL: https://bench.example/{len(created)}\nSenha: bench',
+            })
+            created.append(True)
+    results['service']['create_item'] = measure(create, args.repeat)
+    with app.app_context():
+        new_ids = [item['id'] for item in service.search_items('bench', limit=args.repeat + 2)['items']]
+    results['service']['update_item'] = measure(in_context(lambda: service.update_item(
+        new_ids[0], {'source_file': 'bench/editado.txt', 'raw_content': f'editado {time.time()}'})), args.repeat)
+    pending = list(new_ids)
+    results['service']['delete_item'] = measure(
+        in_context(lambda: pending and service.delete_item(pending.pop())), max(1, min(args.repeat, len(new_ids) - 2)))
+    for name in ('create_item', 'update_item', 'delete_item'):
+        print(f"{name}: p50 {results['service'][name]['p50_ms']} ms")
+    
+    # Exportação completa (uma passada)
+    start = time.perf_counter()
+    with app.app_context():
+        exported = sum(1 for _ in service.iter_items(chunk_size=app.config['EXPORT_CHUNK_SIZE']))
+    elapsed = time.perf_counter() - start
+    results['service']['iter_items (export completo)'] = {
+        'seconds': round(elapsed, 3),
+        'items': exported,
+        'items_per_s': round(exported / elapsed, 1) if elapsed else None,
+    }
+    
+    # Rotas pelo test client (inclui renderização dos templates)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['authenticated'] = True
+    routes = {
+        'GET /': '/',
+        'GET /category/<nome>': f'/category/{category}',
+        'GET /search': '/search?q=login',
+        'GET /item/<id>': f'/item/{item_id}',
+        'GET /api/items': '/api/items?limit=100',
+        'GET /api/stats': '/api/stats',
+    }
+    for name, url in routes.items():
+        def request_route(url=url):
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        results['routes'][name] = measure(request_route, args.repeat, data_cache.clear)
+        print(f"{name}: p50 {results['routes'][name]['p50_ms']} ms")
+    
+    results['meta'] = {
+        'commit': git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'items': args.items if not args.data else None,
+        'data_file': args.data,
+        'data_bytes': os.path.getsize(data_path),
+        'db_bytes': os.path.getsize(db_path),
+        'repeat': args.repeat,
+        'profiling': args.profiling,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+    return results
+
+def compare(results, baseline):
+    """Imprimir a variação de p50 em relação a um resultado anterior"""
+    print(f"\nComparação com {baseline['meta'].get('commit')} ({baseline['meta'].get('items')} itens):")
+    for section in ('service', 'routes'):
+        for name, current in results[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous or 'p50_ms' not in current or not previous.get('p50_ms'):
+                continue
+            change = (current['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100
+            print(f"  {name}: {previous['p50_ms']} -> {current['p50_ms']} ms ({change:+.1f}%)")
+    for key in ('first', 'reimport'):
+        previous = baseline.get('import', {}).get(key)
+        if previous:
+            print(f"  import {key}: {previous['seconds']} -> {results['import'][key]['seconds']} s")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do Atlas Dashboard')
+    parser.add_argument('--items', type=int, default=10000, help='Itens do conjunto sintético')
+    parser.add_argument('--data', help='Usar um dados_organizados.json existente em vez de gerar')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=30, help='Execuções medidas por operação')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: benchmarks/results/)')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--profiling', action='store_true', help='Manter o profiling de requisições ligado')
+    parser.add_argument('--full', action='store_true', help='Rodar operações lentas mesmo com muitos itens')
+    parser.add_argument('--keep', action='store_true', help='Não apagar o diretório temporário')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='atlas-bench-')
+    try:
+        results = run(args, workdir)
+    finally:
+        if args.keep:
+            print(f'Arquivos mantidos em {workdir}')
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    output = args.output
+    if not output:
+        results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+        os.makedirs(results_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(results_dir, f"{stamp}-{results['meta']['commit'] or 'local'}-{args.items}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f'\nResultados gravados em {output}')
+    
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    main()
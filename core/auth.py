@@ -1,26 +1,92 @@
 from functools import wraps
-from flask import session, redirect, url_for, request
+from flask import session, redirect, url_for, request, jsonify, current_app
+from collections import OrderedDict
+import math
+import threading
 import time
 
-# Rate limiting simples
-last_action_time = {}
+class TokenBucketLimiter:
+    """Rate limiting por token bucket com memória limitada
+    
+    Cada cliente (IP + classe de rota) tem um balde que recarrega
+    continuamente; sem tokens a requisição é recusada na hora, sem bloquear
+    a thread. Os baldes menos usados são descartados quando o limite de
+    clientes é atingido.
+    """
+    
+    def __init__(self, max_clients=10000):
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def hit(self, key, capacity, period):
+        """Consumir um token; retorna (permitido, segundos até o próximo token)"""
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        
+        retry_after = 0 if allowed else (1 - tokens) / rate
+        return allowed, retry_after
+
+limiter = TokenBucketLimiter()
+
+def check_rate_limit(route_class):
+    """Aplicar o limite da classe de rota; retorna resposta 429 ou None"""
+    config = current_app.config
+    if not config.get('RATE_LIMIT_ENABLED', True):
+        return None
+    
+    limiter.max_clients = config.get('RATE_LIMIT_MAX_CLIENTS', limiter.max_clients)
+    capacity, period = config[f'RATE_LIMIT_{route_class.upper()}']
+    allowed, retry_after = limiter.hit((request.remote_addr, route_class), capacity, period)
+    if allowed:
+        return None
+    
+    seconds = max(1, math.ceil(retry_after))
+    message = f'Muitas requisições. Tente novamente em {seconds}s.'
+    if request.path.startswith('/api/'):
+        response = jsonify({'error': message})
+    else:
+        response = current_app.response_class(message, mimetype='text/plain')
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+def rate_limit(route_class, methods=None):
+    """Decorator para limitar uma rota pela classe informada (login, read, write)"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if methods is None or request.method in methods:
+                limited = check_rate_limit(route_class)
+                if limited is not None:
+                    return limited
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
 
 def require_auth(f):
     """Decorator para rotas que precisam de autenticação"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Rate limiting básico
-        client_ip = request.remote_addr
-        current_time = time.time()
-        
-        if client_ip in last_action_time:
-            if current_time - last_action_time[client_ip] < 2:
-                time.sleep(1)  # Delay de 1 segundo
-        
-        last_action_time[client_ip] = current_time
+        # Rate limiting: leituras e escritas têm limites separados
+        route_class = 'read' if request.method in ('GET', 'HEAD', 'OPTIONS') else 'write'
+        limited = check_rate_limit(route_class)
+        if limited is not None:
+            return limited
         
         # Verificar autenticação
         if not session.get('authenticated'):
             return redirect(url_for('login'))
         return f(*args, **kwargs)
-    return decorated_function
\ No newline at end of file
+    return decorated_function
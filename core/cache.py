@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from core.config import Config
+from core.db import get_db_connection
+
+class VersionedCache:
+    """Cache em memória invalidado por versão de dados, com TTL e LRU
+    
+    Cada entrada guarda a versão dos dados em que foi calculada e só vale
+    enquanto load_version() devolver a mesma versão. A versão fica no banco,
+    então escritas de outro processo (workers do gunicorn, comandos flask)
+    também invalidam o cache. O TTL limita a idade máxima das entradas.
+    Os valores devolvidos são compartilhados e não devem ser alterados.
+    """
+    
+    def __init__(self, load_version, max_entries=128, ttl=60):
+        self.load_version = load_version
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_or_set(self, key, loader):
+        """Retornar o valor em cache ou calculá-lo com loader()"""
+        now = time.monotonic()
+        # A versão é lida antes de consultar o banco: uma escrita durante o
+        # carregamento invalida o valor recém-calculado
+        version = self.load_version()
+        with self._lock:
+            self.version = version
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        
+        value = loader()
+        
+        with self._lock:
+            self._entries[key] = (version, now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'version': self.version,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
+
+def load_data_version():
+    """Versão atual dos dados gravada no banco"""
+    conn = get_db_connection()
+    try:
+        return conn.execute('SELECT version FROM data_version').fetchone()[0]
+    finally:
+        # A conexão da requisição pode estar no meio de uma transação
+        if not conn.pooled:
+            conn.close()
+
+def bump_data_version(conn):
+    """Invalidar dados em cache após uma escrita
+    
+    Deve ser chamado na transação da escrita, antes do commit: a nova
+    versão fica visível para todos os processos junto com os dados.
+    """
+    conn.execute('UPDATE data_version SET version = version + 1')
+
+# Cache compartilhado pelos serviços
+data_cache = VersionedCache(load_data_version, Config.CACHE_MAX_ENTRIES, Config.CACHE_TTL)
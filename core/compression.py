@@ -0,0 +1,68 @@
+import zlib
+from core.config import Config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Codecs gravados em item_contents.codec
+CODEC_RAW = 'raw'
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+
+_zstd_compressor = None
+_zstd_decompressor = None
+
+def _zstd():
+    """Compressor/descompressor zstd, criados sob demanda"""
+    global _zstd_compressor, _zstd_decompressor
+    if _zstd_compressor is None:
+        _zstd_compressor = zstandard.ZstdCompressor(level=Config.CONTENT_COMPRESSION_LEVEL)
+        _zstd_decompressor = zstandard.ZstdDecompressor()
+    return _zstd_compressor, _zstd_decompressor
+
+def default_codec():
+    """Codec configurado, caindo para zlib quando zstandard não está instalado"""
+    codec = Config.CONTENT_COMPRESSION
+    if codec == CODEC_ZSTD and zstandard is None:
+        return CODEC_ZLIB
+    return codec
+
+def compress_content(text, codec=None):
+    """Comprimir texto; retorna (codec, blob)
+    
+    Conteúdos que não diminuem com a compressão (textos muito curtos) são
+    gravados sem compressão.
+    """
+    raw = (text or '').encode('utf-8')
+    codec = codec or default_codec()
+    if codec == CODEC_ZSTD:
+        data = _zstd()[0].compress(raw)
+    elif codec == CODEC_ZLIB:
+        data = zlib.compress(raw, Config.CONTENT_COMPRESSION_LEVEL)
+    else:
+        data = raw
+    
+    if len(data) >= len(raw):
+        return CODEC_RAW, raw
+    return codec, data
+
+def decompress_content(codec, data):
+    """Texto original de um blob gravado por compress_content"""
+    if data is None:
+        return None
+    if codec == CODEC_ZSTD:
+        raw = _zstd()[1].decompress(data)
+    elif codec == CODEC_ZLIB:
+        raw = zlib.decompress(data)
+    else:
+        raw = data
+    return bytes(raw).decode('utf-8')
+
+def make_preview(text):
+    """Início do conteúdo usado nas listagens"""
+    text = text or ''
+    if len(text) <= Config.PREVIEW_LENGTH:
+        return text
+    return text[:Config.PREVIEW_LENGTH] + '…'
@@ -5,12 +5,61 @@ class Config:
     """Configurações da aplicação"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'change-this-secret-key-in-production'
     MASTER_PASSWORD = os.environ.get('MASTER_PASSWORD') or 'atlas123'
+    # Chave do hash das senhas extraídas (reutilização); trocar a chave recalcula os hashes
+    PASSWORD_HASH_KEY = os.environ.get('PASSWORD_HASH_KEY') or SECRET_KEY
     
     # Database
-    DATABASE_PATH = os.path.join(os.path.dirname(__file__), '..', 'databases', 'app.db')
+    DATABASE_PATH = os.environ.get('DATABASE_PATH') or os.path.join(os.path.dirname(__file__), '..', 'databases', 'app.db')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+    DB_BUSY_TIMEOUT = 30  # segundos aguardando lock de escrita
+    DB_CACHE_SIZE_KB = 64 * 1024  # cache de páginas por conexão
+    DB_MMAP_SIZE = 256 * 1024 * 1024  # leitura via memória mapeada
+    
+    # Conteúdo dos itens (comprimido em item_contents)
+    CONTENT_COMPRESSION = os.environ.get('CONTENT_COMPRESSION') or 'zlib'  # zlib, zstd (requer zstandard) ou raw
+    CONTENT_COMPRESSION_LEVEL = 6
+    PREVIEW_LENGTH = 300  # caracteres guardados em items.preview para as listagens
+    
+    # Paginação
+    PAGE_SIZE = 50  # itens por página em categorias e busca
+    API_MAX_LIMIT = 500  # limite máximo por página em /api/items
+    EXPORT_CHUNK_SIZE = 1000  # itens lidos por consulta no /api/export
+    TOP_DOMAINS = 10  # domínios mais frequentes exibidos no dashboard
+    REUSE_SAMPLE_ITEMS = 10  # itens exibidos por senha no relatório de reutilização
+    
+    # Importação
+    IMPORT_BATCH_SIZE = 2000  # itens gravados por transação
+    EXTRACTION_BATCH_SIZE = 1000  # itens por bloco na extração em lote (flask extract)
+    
+    # Itens parecidos (MinHash/LSH)
+    SIMILARITY_ON_IMPORT = os.environ.get('SIMILARITY_ON_IMPORT', 'True').lower() in ('1', 'true', 'yes')  # senão, flask similarity
+    SIMILARITY_THRESHOLD = 0.7  # similaridade estimada mínima para considerar itens parecidos
+    SIMILAR_ITEMS_LIMIT = 10  # itens parecidos exibidos no detalhe do item
+    LSH_MAX_CANDIDATES = 200  # candidatos verificados por item (os que dividem mais buckets)
+    
+    # Cache de leitura (categorias, estatísticas, itens recentes)
+    CACHE_TTL = 30  # segundos; idade máxima das entradas (a versão dos dados fica no banco)
+    CACHE_MAX_ENTRIES = 128
+    
+    # Profiling por requisição (Server-Timing, log de consultas lentas, /api/profiling)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True').lower() in ('1', 'true', 'yes')
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 100))  # consultas registradas com EXPLAIN QUERY PLAN
+    SLOW_QUERY_LOG_SIZE = 50  # consultas lentas mantidas em memória
+    QUERY_REPEAT_WARNING = 50  # mesma SQL repetida na requisição (N+1)
+    
+    # Servidor (python app.py / flask serve)
+    DEBUG = os.environ.get('DEBUG', 'True').lower() in ('1', 'true', 'yes')
+    HOST = os.environ.get('HOST') or '0.0.0.0'
+    PORT = int(os.environ.get('PORT', 5000))
+    WORKERS = int(os.environ.get('WORKERS', 2))  # processos (gunicorn)
+    THREADS = int(os.environ.get('THREADS', 8))  # threads por processo
     
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     
-    # Rate limiting
-    RATE_LIMIT_DELAY = 2  # segundos entre ações
\ No newline at end of file
+    # Rate limiting (token bucket): (requisições, período em segundos) por IP
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_LOGIN = (5, 60)  # tentativas de login
+    RATE_LIMIT_READ = (120, 60)  # páginas e APIs de leitura
+    RATE_LIMIT_WRITE = (30, 60)  # formulários e operações de escrita
+    RATE_LIMIT_MAX_CLIENTS = 10000  # clientes acompanhados em memória
\ No newline at end of file
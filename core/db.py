@@ -1,20 +1,565 @@
+import logging
 import sqlite3
 import os
+import queue
+import threading
 from datetime import datetime
+from flask import g, has_app_context
+from core.config import Config
+from core.utils import item_hash, entity_hash, password_hash
+from core.profiling import ProfilingCursor, current_profile
+from core.compression import compress_content, decompress_content, make_preview
+from core.extraction import reversed_host, host_domain
 
-def get_db_connection():
-    """Conexão única com o banco SQLite"""
-    db_path = os.path.join(os.path.dirname(__file__), '..', 'databases', 'app.db')
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+logger = logging.getLogger(__name__)
+
+class PooledConnection(sqlite3.Connection):
+    """Conexão SQLite que pode ser devolvida ao pool em vez de fechada
+    
+    Com um QueryProfile em profile (requisições com profiling ligado), as
+    consultas passam por ProfilingCursor; sem ele não há custo extra.
+    """
+    
+    pooled = False
+    profile = None
+    
+    def cursor(self, factory=None):
+        if factory is not None:
+            return super().cursor(factory)
+        if self.profile is not None:
+            return ProfilingCursor(self, self.profile)
+        return super().cursor()
+    
+    def execute(self, sql, parameters=()):
+        if self.profile is None:
+            return super().execute(sql, parameters)
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        if self.profile is None:
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def close(self):
+        # Conexões do pool só descartam a transação pendente; o fechamento
+        # real acontece no teardown do contexto da aplicação
+        if self.pooled:
+            if self.in_transaction:
+                self.rollback()
+            return
+        super().close()
+    
+    def really_close(self):
+        super().close()
+
+class ConnectionPool:
+    """Pool simples de conexões SQLite reaproveitadas entre requisições"""
+    
+    def __init__(self, db_path, size):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
-    conn = sqlite3.connect(db_path)
+    def acquire(self):
+        """Obter conexão ociosa ou abrir uma nova"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = _connect(self.db_path)
+        conn.pooled = True
+        return conn
+    
+    def release(self, conn):
+        """Devolver conexão ao pool (ou fechá-la se o pool estiver cheio)"""
+        conn.profile = None
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.really_close()
+    
+    def close_all(self):
+        """Fechar todas as conexões ociosas"""
+        while True:
+            try:
+                self._idle.get_nowait().really_close()
+            except queue.Empty:
+                break
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Schema criado/migrado neste processo (ou no processo pai, antes do fork)
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def _connect(db_path):
+    """Abrir conexão já configurada com os pragmas de performance"""
+    conn = sqlite3.connect(
+        db_path,
+        timeout=Config.DB_BUSY_TIMEOUT,
+        factory=PooledConnection,
+        check_same_thread=False,
+    )
     conn.row_factory = sqlite3.Row
+    conn.create_function('item_hash', 3, item_hash, deterministic=True)
+    conn.create_function('item_content', 2, decompress_content, deterministic=True)
+    conn.create_function('entity_hash', 2, entity_hash, deterministic=True)
+    conn.create_function('reversed_host', 1, reversed_host, deterministic=True)
+    conn.create_function('host_domain', 1, host_domain, deterministic=True)
+    conn.create_function('password_hash', 1, lambda value: password_hash(value, Config.PASSWORD_HASH_KEY), deterministic=True)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = -{int(Config.DB_CACHE_SIZE_KB)}')
+    conn.execute(f'PRAGMA mmap_size = {int(Config.DB_MMAP_SIZE)}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA foreign_keys = ON')
     return conn
 
-def init_db():
-    """Inicializar estrutura do banco"""
-    conn = get_db_connection()
+def get_pool():
+    """Pool global, criado sob demanda"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(Config.DATABASE_PATH, Config.DB_POOL_SIZE)
+    return _pool
+
+def get_db_connection():
+    """Conexão com o banco SQLite
+    
+    Dentro de um contexto Flask a mesma conexão do pool é reaproveitada por
+    todas as chamadas da requisição; fora dele (scripts, threads de fundo)
+    uma conexão dedicada é aberta e deve ser fechada pelo chamador.
+    """
+    if has_app_context():
+        conn = g.get('_db_conn')
+        if conn is None:
+            conn = g._db_conn = get_pool().acquire()
+            conn.profile = current_profile()
+        return conn
+    
+    os.makedirs(os.path.dirname(Config.DATABASE_PATH), exist_ok=True)
+    return _connect(Config.DATABASE_PATH)
+
+def release_db_connection(exception=None):
+    """Devolver a conexão da requisição ao pool"""
+    conn = g.pop('_db_conn', None)
+    if conn is not None:
+        get_pool().release(conn)
+
+def reset_pool():
+    """Fechar conexões do pool (ex.: antes de criar processos filhos)"""
+    global _pool
+    if has_app_context():
+        release_db_connection()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+
+def init_app(app):
+    """Registrar o ciclo de vida das conexões e a criação do schema na aplicação"""
+    app.before_request(ensure_schema)
+    app.teardown_appcontext(release_db_connection)
+
+# Conteúdo completo de um item (uso em UPDATE/SELECT sobre items)
+ITEM_CONTENT_SQL = '(SELECT item_content(codec, data) FROM item_contents WHERE item_id = items.id)'
+
+# Gravar conteúdo comprimido: (item_id, codec, data). Upsert em vez de REPLACE
+# para disparar o trigger de atualização do FTS
+SAVE_CONTENT_SQL = '''
+    INSERT INTO item_contents (item_id, codec, data) VALUES (?, ?, ?)
+    ON CONFLICT (item_id) DO UPDATE SET codec = excluded.codec, data = excluded.data
+'''
+
+# Colunas das tabelas de ligação calculadas a partir do valor: tabela -> (coluna, expressão)
+LINK_VALUE_COLUMNS = {
+    'urls': ('host', 'reversed_host(value)'),
+    'passwords': ('credential_hash', 'password_hash(value)'),
+}
+
+def insert_entities(conn, rows_by_table, source='regex'):
+    """Gravar dados extraídos: {tabela: [(item_id, valor)]}
+    
+    Cada valor distinto é guardado uma única vez em entity_values,
+    identificado pelo hash; as tabelas de cada tipo guardam só a ligação
+    item -> valor e a origem (source: 'import' para o extracted_info do
+    JSON, 'regex' para o que foi extraído do conteúdo). Valores que o item
+    já tem não são ligados de novo. Não faz commit. Retorna a quantidade
+    de ligações gravadas.
+    """
+    rows = 0
+    for table, values in rows_by_table.items():
+        if not values:
+            continue
+        hashed = [(item_id, entity_hash(table, value), value) for item_id, value in values]
+        conn.executemany('''
+            INSERT INTO entity_values (kind, hash, value) VALUES (?, ?, ?)
+            ON CONFLICT (hash) DO NOTHING
+        ''', list({value_hash: (table, value_hash, value) for _, value_hash, value in hashed}.values()))
+        column, expression = LINK_VALUE_COLUMNS.get(table, (None, None))
+        cursor = conn.executemany(f'''
+            INSERT INTO {table} (item_id, value_id, source{f', {column}' if column else ''})
+            SELECT :item_id, v.id, :source{f', {expression}' if column else ''}
+            FROM entity_values v
+            WHERE v.hash = :hash AND NOT EXISTS (
+                SELECT 1 FROM {table} WHERE item_id = :item_id AND value_id = v.id
+            )
+        ''', [
+            {'item_id': item_id, 'hash': value_hash, 'source': source}
+            for item_id, value_hash, _ in hashed
+        ])
+        rows += cursor.rowcount
+    return rows
+
+def init_content_store(conn, batch_size=1000):
+    """Guardar o conteúdo dos itens comprimido em item_contents
+    
+    items fica só com a prévia usada nas listagens; o texto completo é
+    descomprimido apenas quando um item é aberto. Bancos antigos têm o
+    conteúdo movido de items.raw_content em lotes, e a coluna é removida
+    (rode VACUUM depois para devolver o espaço ao sistema).
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS item_contents (
+            item_id INTEGER PRIMARY KEY,
+            codec TEXT NOT NULL,
+            data BLOB NOT NULL
+        )
+    ''')
+    
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(items)')]
+    if 'preview' not in columns:
+        conn.execute('ALTER TABLE items ADD COLUMN preview TEXT')
+    
+    if 'raw_content' in columns:
+        # O índice FTS antigo lê items.raw_content; é recriado por init_fts
+        for trigger in ('items_fts_insert', 'items_fts_delete', 'items_fts_update'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        conn.execute('DROP TABLE IF EXISTS items_fts')
+        
+        last_id = 0
+        while True:
+            rows = conn.execute('''
+                SELECT id, raw_content FROM items
+                WHERE id > ? AND raw_content IS NOT NULL
+                ORDER BY id LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            conn.executemany(
+                'INSERT OR REPLACE INTO item_contents (item_id, codec, data) VALUES (?, ?, ?)',
+                [(row['id'], *compress_content(row['raw_content'])) for row in rows]
+            )
+            conn.executemany(
+                'UPDATE items SET preview = ? WHERE id = ?',
+                [(make_preview(row['raw_content']), row['id']) for row in rows]
+            )
+            last_id = rows[-1]['id']
+        
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            conn.execute('ALTER TABLE items DROP COLUMN raw_content')
+        else:
+            conn.execute('UPDATE items SET raw_content = NULL')
+    
+    # Conteúdo sai junto com o item (antes, para o FTS ainda achar o source_file)
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS items_contents_delete BEFORE DELETE ON items BEGIN
+            DELETE FROM item_contents WHERE item_id = old.id;
+        END
+    ''')
+
+def init_content_hash(conn):
+    """Garantir coluna content_hash com índice único em items
+    
+    Em bancos anteriores à coluna, os hashes são calculados no próprio SQLite
+    e apenas o item mais antigo de cada grupo de duplicados recebe o hash;
+    os demais ficam com NULL até serem removidos como duplicados.
+    """
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(items)')]
+    if 'content_hash' not in columns:
+        conn.execute('ALTER TABLE items ADD COLUMN content_hash TEXT')
+        conn.execute(f'''
+            UPDATE items
+            SET content_hash = item_hash(
+                (SELECT name FROM categories WHERE id = items.category_id),
+                source_file, {ITEM_CONTENT_SQL}
+            )
+        ''')
+        conn.execute('''
+            UPDATE items SET content_hash = NULL
+            WHERE id NOT IN (SELECT MIN(id) FROM items GROUP BY content_hash)
+        ''')
+    
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_items_content_hash ON items(content_hash)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_items_category_source ON items(category_id, source_file)')
+
+def init_fts(conn):
+    """Criar índice FTS5 de items e preenchê-lo na primeira execução
+    
+    O índice usa como conteúdo externo a view items_fts_content, que
+    descomprime o texto de item_contents; assim o texto não é duplicado
+    e snippet() só descomprime os itens exibidos.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'"
+    ).fetchone()
+    
+    conn.execute('''
+        CREATE VIEW IF NOT EXISTS items_fts_content AS
+        SELECT ic.item_id AS id, i.source_file, item_content(ic.codec, ic.data) AS raw_content
+        FROM item_contents ic
+        JOIN items i ON i.id = ic.item_id
+    ''')
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+            source_file,
+            raw_content,
+            content = 'items_fts_content',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    ''')
+    
+    # Itens são indexados quando o conteúdo é gravado (sempre depois do item)
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS item_contents_fts_insert AFTER INSERT ON item_contents BEGIN
+            INSERT INTO items_fts (rowid, source_file, raw_content)
+            VALUES (new.item_id, (SELECT source_file FROM items WHERE id = new.item_id),
+                    item_content(new.codec, new.data));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS item_contents_fts_delete AFTER DELETE ON item_contents BEGIN
+            INSERT INTO items_fts (items_fts, rowid, source_file, raw_content)
+            VALUES ('delete', old.item_id, (SELECT source_file FROM items WHERE id = old.item_id),
+                    item_content(old.codec, old.data));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS item_contents_fts_update AFTER UPDATE ON item_contents BEGIN
+            INSERT INTO items_fts (items_fts, rowid, source_file, raw_content)
+            VALUES ('delete', old.item_id, (SELECT source_file FROM items WHERE id = old.item_id),
+                    item_content(old.codec, old.data));
+            INSERT INTO items_fts (rowid, source_file, raw_content)
+            VALUES (new.item_id, (SELECT source_file FROM items WHERE id = new.item_id),
+                    item_content(new.codec, new.data));
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF source_file ON items
+        WHEN old.source_file IS NOT new.source_file BEGIN
+            INSERT INTO items_fts (items_fts, rowid, source_file, raw_content)
+            SELECT 'delete', old.id, old.source_file, item_content(codec, data)
+            FROM item_contents WHERE item_id = old.id;
+            INSERT INTO items_fts (rowid, source_file, raw_content)
+            SELECT new.id, new.source_file, item_content(codec, data)
+            FROM item_contents WHERE item_id = new.id;
+        END
+    ''')
+    
+    # Bancos existentes: indexar os itens que já estavam gravados
+    if not exists:
+        conn.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+
+# Tabelas com total mantido em table_counts
+COUNTED_TABLES = ['categories', 'items', 'passwords', 'emails', 'urls', 'private_keys', 'seeds']
+
+def init_counters(conn):
+    """Criar tabelas de contadores e os triggers que as mantêm"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'table_counts'"
+    ).fetchone()
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_counts (
+            name TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS category_counts (
+            category_id INTEGER PRIMARY KEY,
+            item_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    
+    for table in COUNTED_TABLES:
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_insert AFTER INSERT ON {table} BEGIN
+                UPDATE table_counts SET count = count + 1 WHERE name = '{table}';
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_delete AFTER DELETE ON {table} BEGIN
+                UPDATE table_counts SET count = count - 1 WHERE name = '{table}';
+            END
+        ''')
+    
+    # Itens por categoria: inserção, remoção e mudança de categoria
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS items_category_count_insert AFTER INSERT ON items
+        WHEN new.category_id IS NOT NULL BEGIN
+            INSERT INTO category_counts (category_id, item_count) VALUES (new.category_id, 1)
+            ON CONFLICT (category_id) DO UPDATE SET item_count = item_count + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS items_category_count_delete AFTER DELETE ON items
+        WHEN old.category_id IS NOT NULL BEGIN
+            UPDATE category_counts SET item_count = item_count - 1 WHERE category_id = old.category_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS items_category_count_update AFTER UPDATE OF category_id ON items
+        WHEN old.category_id IS NOT new.category_id BEGIN
+            UPDATE category_counts SET item_count = item_count - 1 WHERE category_id = old.category_id;
+            INSERT INTO category_counts (category_id, item_count)
+            SELECT new.category_id, 1 WHERE new.category_id IS NOT NULL
+            ON CONFLICT (category_id) DO UPDATE SET item_count = item_count + 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS categories_category_count_delete AFTER DELETE ON categories BEGIN
+            DELETE FROM category_counts WHERE category_id = old.id;
+        END
+    ''')
+    
+    # Bancos existentes: calcular os contadores a partir dos dados atuais
+    if not exists:
+        rebuild_counters(conn)
+
+# Contagens de itens distintos por chave, mantidas por triggers (ver
+# _create_rollup_triggers): tabela -> (coluna da chave, SQL que recalcula)
+ROLLUP_TABLES = {
+    # Itens por domínio registrável das URLs
+    'domain_counts': ('domain', '''
+        SELECT domain, COUNT(*) FROM (
+            SELECT DISTINCT item_id, host_domain(host) AS domain FROM urls WHERE host IS NOT NULL
+        )
+        GROUP BY domain
+    '''),
+    # Itens por senha (hash com chave)
+    'password_reuse': ('credential_hash', '''
+        SELECT credential_hash, COUNT(DISTINCT item_id) FROM passwords
+        WHERE credential_hash IS NOT NULL
+        GROUP BY credential_hash
+    '''),
+}
+
+def _table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+def _rebuild_rollup(conn, rollup):
+    key, sql = ROLLUP_TABLES[rollup]
+    conn.execute(f'DELETE FROM {rollup}')
+    conn.execute(f'INSERT INTO {rollup} ({key}, item_count) {sql}')
+
+def _create_rollup_triggers(conn, source, name, key_sql, rollup, rollup_key, prune=False):
+    """Triggers que mantêm em rollup quantos itens distintos de source têm cada chave
     
+    key_sql é a expressão da chave sobre as colunas de source, com {} no
+    lugar do prefixo (new./old.). Um item conta uma vez por chave, mesmo com
+    várias linhas dela. Com prune=True chaves que chegam a zero são apagadas.
+    """
+    new_key, old_key, row_key = key_sql.format('new.'), key_sql.format('old.'), key_sql.format('')
+    prune_sql = f'''
+            DELETE FROM {rollup} WHERE {rollup_key} = {old_key} AND item_count <= 0;''' if prune else ''
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {source}_{name}_count_insert AFTER INSERT ON {source}
+        WHEN {new_key} IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM {source}
+            WHERE item_id = new.item_id AND id <> new.id AND {row_key} = {new_key}
+        ) BEGIN
+            INSERT INTO {rollup} ({rollup_key}, item_count) VALUES ({new_key}, 1)
+            ON CONFLICT ({rollup_key}) DO UPDATE SET item_count = item_count + 1;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {source}_{name}_count_delete AFTER DELETE ON {source}
+        WHEN {old_key} IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM {source}
+            WHERE item_id = old.item_id AND {row_key} = {old_key}
+        ) BEGIN
+            UPDATE {rollup} SET item_count = item_count - 1 WHERE {rollup_key} = {old_key};{prune_sql}
+        END
+    ''')
+    # remove_duplicates move linhas entre itens
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {source}_{name}_count_update AFTER UPDATE ON {source}
+        WHEN old.item_id IS NOT new.item_id OR {old_key} IS NOT {new_key} BEGIN
+            UPDATE {rollup} SET item_count = item_count - 1
+            WHERE {old_key} IS NOT NULL AND {rollup_key} = {old_key} AND NOT EXISTS (
+                SELECT 1 FROM {source}
+                WHERE item_id = old.item_id AND {row_key} = {old_key}
+            );{prune_sql}
+            INSERT INTO {rollup} ({rollup_key}, item_count)
+            SELECT {new_key}, 1
+            WHERE {new_key} IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM {source}
+                WHERE item_id = new.item_id AND id <> new.id AND {row_key} = {new_key}
+            )
+            ON CONFLICT ({rollup_key}) DO UPDATE SET item_count = item_count + 1;
+        END
+    ''')
+
+def rebuild_counters(conn):
+    """Recalcular todos os contadores a partir das tabelas"""
+    conn.execute('DELETE FROM table_counts')
+    for table in COUNTED_TABLES:
+        conn.execute(
+            f'INSERT INTO table_counts (name, count) SELECT ?, COUNT(*) FROM {table}',
+            (table,)
+        )
+    conn.execute('DELETE FROM category_counts')
+    conn.execute('''
+        INSERT INTO category_counts (category_id, item_count)
+        SELECT c.id, COUNT(i.id)
+        FROM categories c
+        LEFT JOIN items i ON i.category_id = c.id
+        GROUP BY c.id
+    ''')
+    for rollup in ROLLUP_TABLES:
+        # Migrações anteriores à tabela também recalculam os contadores
+        if _table_exists(conn, rollup):
+            _rebuild_rollup(conn, rollup)
+
+def verify_counters(conn):
+    """Comparar contadores com contagens reais; retorna as divergências"""
+    mismatches = []
+    stored = {row['name']: row['count'] for row in conn.execute('SELECT name, count FROM table_counts')}
+    for table in COUNTED_TABLES:
+        actual = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        if stored.get(table) != actual:
+            mismatches.append({'counter': table, 'stored': stored.get(table), 'actual': actual})
+    
+    rows = conn.execute('''
+        SELECT c.id, c.name, COALESCE(cc.item_count, 0) as stored,
+               (SELECT COUNT(*) FROM items i WHERE i.category_id = c.id) as actual
+        FROM categories c
+        LEFT JOIN category_counts cc ON cc.category_id = c.id
+    ''')
+    for row in rows:
+        if row['stored'] != row['actual']:
+            mismatches.append({'counter': f"category:{row['name']}", 'stored': row['stored'], 'actual': row['actual']})
+    
+    for rollup, (key, sql) in ROLLUP_TABLES.items():
+        if not _table_exists(conn, rollup):
+            continue
+        stored = dict(conn.execute(f'SELECT {key}, item_count FROM {rollup} WHERE item_count <> 0').fetchall())
+        actual = dict(conn.execute(sql).fetchall())
+        for value in sorted(set(stored) | set(actual)):
+            if stored.get(value, 0) != actual.get(value, 0):
+                mismatches.append({'counter': f'{rollup}:{value}', 'stored': stored.get(value, 0), 'actual': actual.get(value, 0)})
+    return mismatches
+
+def _migration_base_schema(conn):
+    """Schema base: tabelas, índices, conteúdo comprimido, FTS e contadores"""
     # Tabela de categorias
     conn.execute('''
         CREATE TABLE IF NOT EXISTS categories (
@@ -31,7 +576,8 @@ def init_db():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             category_id INTEGER,
             source_file TEXT NOT NULL,
-            raw_content TEXT,
+            preview TEXT,
+            content_hash TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (category_id) REFERENCES categories (id)
         )
@@ -92,6 +638,404 @@ def init_db():
     conn.execute('CREATE INDEX IF NOT EXISTS idx_items_category ON items(category_id)')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_passwords_item ON passwords(item_id)')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_emails_item ON emails(item_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_item ON urls(item_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_private_keys_item ON private_keys(item_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_seeds_item ON seeds(item_id)')
+    
+    # Índices para busca por valor extraído (email:, url:, senha:, ...)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_emails_email ON emails(email)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_url ON urls(url)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_passwords_password ON passwords(password)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_private_keys_value ON private_keys(key_value)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_seeds_phrase ON seeds(seed_phrase)')
+    
+    # Conteúdo completo comprimido fora da tabela items
+    init_content_store(conn)
+    
+    # Hash de conteúdo para reimportação idempotente
+    init_content_hash(conn)
+    
+    # Índice full-text dos itens (FTS5), sincronizado por triggers
+    init_fts(conn)
+    
+    # Contadores agregados para o dashboard, mantidos por triggers
+    init_counters(conn)
+    
+    # Progresso das importações, visível para todos os processos
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            snapshot TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+
+def _migration_created_at_index(conn):
+    """Índice em items(created_at) para os itens recentes"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_items_created_at ON items(created_at)')
+
+# Tabelas filhas de items e suas colunas (sem id/item_id)
+CHILD_TABLES = {
+    'passwords': "password TEXT NOT NULL, type TEXT DEFAULT 'password'",
+    'emails': 'email TEXT NOT NULL',
+    'urls': 'url TEXT NOT NULL',
+    'private_keys': 'key_value TEXT NOT NULL',
+    'seeds': 'seed_phrase TEXT NOT NULL',
+}
+
+def _migration_cascade_foreign_keys(conn):
+    """Recriar tabelas filhas com FOREIGN KEY ... ON DELETE CASCADE
+    
+    SQLite não altera restrições de tabelas existentes: cada tabela é
+    copiada para uma nova, e índices e triggers são recriados a partir do
+    sqlite_master. Linhas órfãs (de itens já removidos) não são copiadas.
+    """
+    for table, columns in CHILD_TABLES.items():
+        foreign_keys = conn.execute(f'PRAGMA foreign_key_list({table})').fetchall()
+        if any(fk['table'] == 'items' and fk['on_delete'] == 'CASCADE' for fk in foreign_keys):
+            continue
+        
+        dependents = [row['sql'] for row in conn.execute('''
+            SELECT sql FROM sqlite_master
+            WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL
+        ''', (table,))]
+        column_names = [row['name'] for row in conn.execute(f'PRAGMA table_info({table})')]
+        
+        conn.execute(f'''
+            CREATE TABLE {table}_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER,
+                {columns},
+                FOREIGN KEY (item_id) REFERENCES items (id) ON DELETE CASCADE
+            )
+        ''')
+        names = ', '.join(column_names)
+        conn.execute(f'''
+            INSERT INTO {table}_new ({names})
+            SELECT {names} FROM {table}
+            WHERE item_id IN (SELECT id FROM items)
+        ''')
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+        for sql in dependents:
+            conn.execute(sql)
+        
+        if conn.execute(f'PRAGMA foreign_key_check({table})').fetchone():
+            raise sqlite3.IntegrityError(f'{table}: violação de chave estrangeira após a migração')
+    
+    # Órfãos descartados mudam os totais
+    rebuild_counters(conn)
+
+# Coluna de valor de cada tabela filha antes do dicionário entity_values
+LEGACY_VALUE_COLUMNS = {
+    'passwords': 'password',
+    'emails': 'email',
+    'urls': 'url',
+    'private_keys': 'key_value',
+    'seeds': 'seed_phrase',
+}
+
+def _migration_entity_values(conn):
+    """Dicionário de valores extraídos (entity_values) e tabelas de ligação
+    
+    Cada valor distinto (por tipo) passa a ser gravado uma vez em
+    entity_values, com índice único no hash; passwords, emails, urls,
+    private_keys e seeds guardam só (item_id, value_id). Valores sem
+    nenhuma ligação são apagados por trigger.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS entity_values (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            hash BLOB NOT NULL,
+            value TEXT NOT NULL
+        )
+    ''')
+    # Hash para gravar/achar um valor exato; (kind, value) para busca por prefixo
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_entity_values_hash ON entity_values(hash)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_entity_values_kind_value ON entity_values(kind, value)')
+    
+    for table, column in LEGACY_VALUE_COLUMNS.items():
+        column_names = [row['name'] for row in conn.execute(f'PRAGMA table_info({table})')]
+        if 'value_id' in column_names:
+            continue
+        
+        conn.execute(f'''
+            INSERT INTO entity_values (kind, hash, value)
+            SELECT '{table}', entity_hash('{table}', {column}), {column}
+            FROM (SELECT DISTINCT {column} FROM {table})
+            WHERE true
+            ON CONFLICT (hash) DO NOTHING
+        ''')
+        
+        # Triggers (contadores) continuam; os índices da coluna de valor não
+        triggers = [row['sql'] for row in conn.execute('''
+            SELECT sql FROM sqlite_master
+            WHERE tbl_name = ? AND type = 'trigger' AND sql IS NOT NULL
+        ''', (table,))]
+        has_type = 'type' in column_names
+        conn.execute(f'''
+            CREATE TABLE {table}_new (
+                id INTEGER PRIMARY KEY,
+                item_id INTEGER NOT NULL,
+                value_id INTEGER NOT NULL,
+                {"type TEXT DEFAULT 'password'," if has_type else ''}
+                FOREIGN KEY (item_id) REFERENCES items (id) ON DELETE CASCADE,
+                FOREIGN KEY (value_id) REFERENCES entity_values (id)
+            )
+        ''')
+        conn.execute(f'''
+            INSERT INTO {table}_new (id, item_id, value_id{', type' if has_type else ''})
+            SELECT t.id, t.item_id, v.id{', t.type' if has_type else ''}
+            FROM {table} t
+            JOIN entity_values v ON v.kind = '{table}' AND v.value = t.{column}
+            WHERE t.item_id IS NOT NULL
+        ''')
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+        for sql in triggers:
+            conn.execute(sql)
+        
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_item ON {table}(item_id)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_value ON {table}(value_id)')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_value_release AFTER DELETE ON {table}
+            WHEN NOT EXISTS (SELECT 1 FROM {table} WHERE value_id = old.value_id) BEGIN
+                DELETE FROM entity_values WHERE id = old.value_id;
+            END
+        ''')
+    
+    rebuild_counters(conn)
+
+def _migration_url_hosts(conn):
+    """Host invertido das URLs (urls.host) e itens por domínio (domain_counts)
+    
+    O host é gravado invertido (com.example.login) e indexado, então um
+    domínio e todos os seus subdomínios são uma faixa contínua do índice.
+    domain_counts guarda quantos itens têm URL de cada domínio registrável
+    e é mantida por triggers.
+    """
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(urls)')]
+    if 'host' not in columns:
+        conn.execute('ALTER TABLE urls ADD COLUMN host TEXT')
+        conn.execute('''
+            UPDATE urls
+            SET host = (SELECT reversed_host(value) FROM entity_values WHERE id = urls.value_id)
+        ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_host ON urls(host)')
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS domain_counts (
+            domain TEXT PRIMARY KEY,
+            item_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_domain_counts_count ON domain_counts(item_count)')
+    
+    _create_rollup_triggers(conn, 'urls', 'domain', 'host_domain({}host)', 'domain_counts', 'domain')
+    
+    _rebuild_rollup(conn, 'domain_counts')
+
+# Valor de referência para saber com qual chave os hashes de senha foram gravados
+PASSWORD_HASH_CHECK = 'atlas:password-hash-key'
+
+def _migration_password_reuse(conn):
+    """Hash com chave das senhas (passwords.credential_hash) e reutilização (password_reuse)
+    
+    credential_hash é um blake2b com chave (PASSWORD_HASH_KEY), indexado
+    junto com item_id; password_reuse guarda quantos itens têm cada senha,
+    mantida por triggers, e só tem linhas para senhas ainda em uso.
+    """
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(passwords)')]
+    if 'credential_hash' not in columns:
+        conn.execute('ALTER TABLE passwords ADD COLUMN credential_hash TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_passwords_credential ON passwords(credential_hash, item_id)')
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS password_reuse (
+            credential_hash TEXT PRIMARY KEY,
+            item_count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    # Relatório ordenado por quantidade de itens (a chave primária vai junto no índice)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_password_reuse_count ON password_reuse(item_count)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS app_settings (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    
+    # Hashes calculados antes dos triggers; a tabela de reutilização é montada de uma vez
+    sync_password_hashes(conn, force=True)
+    _create_rollup_triggers(conn, 'passwords', 'reuse', '{}credential_hash', 'password_reuse', 'credential_hash', prune=True)
+
+def sync_password_hashes(conn, force=False):
+    """Recalcular os hashes das senhas se PASSWORD_HASH_KEY mudou desde a gravação
+    
+    Retorna True quando os hashes foram recalculados. Não faz commit.
+    """
+    check = password_hash(PASSWORD_HASH_CHECK, Config.PASSWORD_HASH_KEY)
+    stored = conn.execute("SELECT value FROM app_settings WHERE name = 'password_hash_check'").fetchone()
+    if not force and stored is not None and stored[0] == check:
+        return False
+    
+    conn.execute('''
+        UPDATE passwords
+        SET credential_hash = (SELECT password_hash(value) FROM entity_values WHERE id = passwords.value_id)
+    ''')
+    _rebuild_rollup(conn, 'password_reuse')
+    conn.execute('''
+        INSERT INTO app_settings (name, value) VALUES ('password_hash_check', ?)
+        ON CONFLICT (name) DO UPDATE SET value = excluded.value
+    ''', (check,))
+    return True
+
+def _migration_similarity(conn):
+    """Assinaturas MinHash (item_signatures), buckets LSH (item_lsh) e grupos de similares
+    
+    Cada item tem uma assinatura de 256 bytes e um bucket por faixa LSH;
+    itens parecidos dividem buckets, então os candidatos saem de buscas no
+    índice de item_lsh. similar_groups guarda o último agrupamento calculado.
+    As assinaturas dos itens existentes são geradas por flask similarity.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS item_signatures (
+            item_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL,
+            FOREIGN KEY (item_id) REFERENCES items (id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS item_lsh (
+            bucket INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, item_id),
+            FOREIGN KEY (item_id) REFERENCES items (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_item_lsh_item ON item_lsh(item_id)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS similar_groups (
+            item_id INTEGER PRIMARY KEY,
+            group_id INTEGER NOT NULL,
+            FOREIGN KEY (item_id) REFERENCES items (id) ON DELETE CASCADE
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_similar_groups_group ON similar_groups(group_id)')
+
+def _migration_data_version(conn):
+    """Versão dos dados (data_version) compartilhada pelos caches de todos os processos
+    
+    Toda escrita que afeta dados em cache incrementa o contador na própria
+    transação; cada processo compara a versão gravada com a das entradas.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)')
+
+def _migration_entity_sources(conn):
+    """Origem dos dados extraídos (source): extracted_info do import ou regex
+    
+    A re-extração (edição do item, flask extract) só regrava as ligações
+    'regex'; as que vieram do extracted_info do JSON são mantidas. A origem
+    das ligações já gravadas não é conhecida, então elas ficam como
+    'import' e nunca são apagadas pela re-extração. ADD COLUMN com valor
+    padrão constante não reescreve as tabelas.
+    """
+    for table in LEGACY_VALUE_COLUMNS:
+        column_names = [row['name'] for row in conn.execute(f'PRAGMA table_info({table})')]
+        if 'source' not in column_names:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN source TEXT NOT NULL DEFAULT 'import'")
+
+# Migrações em ordem; a posição na lista (1, 2, ...) é gravada em PRAGMA user_version
+MIGRATIONS = [
+    _migration_base_schema,
+    _migration_created_at_index,
+    _migration_cascade_foreign_keys,
+    _migration_entity_values,
+    _migration_url_hosts,
+    _migration_password_reuse,
+    _migration_similarity,
+    _migration_data_version,
+    _migration_entity_sources,
+]
+
+def migrate(conn):
+    """Aplicar as migrações pendentes; retorna a lista de versões aplicadas
+    
+    Cada migração roda na própria transação (BEGIN IMMEDIATE) junto com a
+    atualização de user_version, então pode ser aplicada com a aplicação
+    no ar: leitores continuam usando o WAL e outros escritores aguardam o
+    busy timeout. As chaves estrangeiras ficam desligadas durante as
+    migrações, que recriam tabelas.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+    applied = []
+    
+    conn.execute('PRAGMA foreign_keys = OFF')
+    try:
+        for version, migration in enumerate(MIGRATIONS, start=1):
+            if version <= current:
+                continue
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Outro processo pode ter migrado enquanto aguardávamos o lock
+                if conn.execute('PRAGMA user_version').fetchone()[0] >= version:
+                    conn.rollback()
+                    continue
+                migration(conn)
+                conn.execute(f'PRAGMA user_version = {version}')
+                conn.commit()
+            except:
+                conn.rollback()
+                raise
+            applied.append(version)
+            logger.info('Migração %d aplicada: %s', version, migration_title(version))
+    finally:
+        conn.execute('PRAGMA foreign_keys = ON')
+    
+    return applied
+
+def migration_title(version):
+    """Primeira linha da docstring da migração (1, 2, ...)"""
+    return MIGRATIONS[version - 1].__doc__.splitlines()[0]
+
+def schema_version(conn):
+    """Versão atual do schema e a versão mais recente conhecida"""
+    return conn.execute('PRAGMA user_version').fetchone()[0], len(MIGRATIONS)
+
+def init_db():
+    """Inicializar/migrar estrutura do banco"""
+    conn = get_db_connection()
+    try:
+        applied = migrate(conn)
+        if schema_version(conn)[0] >= MIGRATIONS.index(_migration_password_reuse) + 1:
+            conn.execute('BEGIN IMMEDIATE')
+            if sync_password_hashes(conn):
+                logger.warning('Hashes de senha recalculados com a nova PASSWORD_HASH_KEY')
+            conn.commit()
+        return applied
+    finally:
+        conn.close()
+
+def ensure_schema():
+    """Criar/migrar o schema uma única vez por processo
     
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    Roda antes da primeira requisição, então a aplicação funciona com
+    qualquer servidor (gunicorn app:app, flask run), mesmo com banco novo.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            init_db()
+            _schema_ready = True
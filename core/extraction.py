@@ -0,0 +1,100 @@
+import re
+from urllib.parse import urlsplit
+
+# Tabelas de dados extraídos (ligações item -> valor em entity_values)
+ENTITY_TABLES = ['passwords', 'emails', 'urls', 'private_keys', 'seeds']
+
+EMAIL_RE = re.compile(r'(?<![\w.+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,24}\b')
+
+URL_RE = re.compile(r'\b(?:https?|ftp)://[^\s<>"\'`]+|\bwww\.[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+[^\s<>"\'`]*', re.IGNORECASE)
+
+# Senhas rotuladas: "Senha: xyz", "password = xyz", "pwd: xyz"
+PASSWORD_RE = re.compile(
+    r'^[^\S\n]*(?:senha|password|passwd|pass|pwd)[^\S\n]*[:=][^\S\n]*(\S[^\n]*?)[^\S\n]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+_BASE58 = '1-9A-HJ-NP-Za-km-z'
+# Chaves: hex de 32 bytes (com ou sem 0x), WIF, xprv e chaves base58 de 64 bytes (Solana)
+KEY_RE = re.compile(
+    r'(?<![0-9A-Za-z])(?:'
+    r'(?:0x)?[0-9a-fA-F]{64}'
+    rf'|[5KL][{_BASE58}]{{50,51}}'
+    rf'|[xt]prv[{_BASE58}]{{107,108}}'
+    rf'|[{_BASE58}]{{86,88}}'
+    r')(?![0-9A-Za-z])'
+)
+
+# Frases no estilo BIP39: 12 a 24 palavras minúsculas de 3 a 8 letras ocupando
+# a linha (opcionalmente depois de um rótulo como "Seed:")
+SEED_RE = re.compile(
+    r'^[^\S\n]*(?:[^\n:]{1,30}:[^\S\n]*)?((?:[a-z]{3,8}[^\S\n]+){11,23}[a-z]{3,8})[^\S\n]*$',
+    re.MULTILINE
+)
+SEED_LENGTHS = {12, 15, 18, 21, 24}
+
+# Segundo nível usado sob TLDs de país (empresa.com.br, site.co.uk): o domínio
+# registrável tem três rótulos
+SECOND_LEVEL_DOMAINS = {
+    'com', 'net', 'org', 'gov', 'edu', 'mil', 'co', 'ac', 'or', 'ne', 'go',
+    'nom', 'art', 'blog', 'eco', 'ind', 'inf', 'adv', 'eng', 'med', 'ltd', 'plc', 'gob',
+}
+
+IP_RE = re.compile(r'[\d.]+|.*:.*')
+
+# Pontuação que costuma grudar no fim de URLs em texto corrido
+URL_TRAILING = '.,;:!?)]}\'"'
+
+def _unique(values):
+    """Remover repetidos mantendo a ordem"""
+    return list(dict.fromkeys(values))
+
+def extract_entities(text):
+    """Extrair senhas, emails, URLs, chaves e seeds de um texto
+    
+    Retorna {tabela: [valores]} com as chaves de ENTITY_TABLES.
+    """
+    text = text or ''
+    seeds = []
+    for match in SEED_RE.finditer(text):
+        words = match.group(1).split()
+        if len(words) in SEED_LENGTHS:
+            seeds.append(' '.join(words))
+    
+    urls = [url.rstrip(URL_TRAILING) for url in URL_RE.findall(text)]
+    return {
+        'passwords': _unique(PASSWORD_RE.findall(text)),
+        'emails': _unique(EMAIL_RE.findall(text)) if '@' in text else [],
+        'urls': _unique(url for url in urls if url),
+        'private_keys': _unique(KEY_RE.findall(text)),
+        'seeds': _unique(seeds),
+    }
+
+def reversed_host(url):
+    """Host de uma URL com os rótulos invertidos (login.example.com -> com.example.login)
+    
+    Na ordem invertida os subdomínios de um domínio ficam contíguos no
+    índice. IPs são mantidos como estão; retorna None se não houver host.
+    """
+    if not url:
+        return None
+    if '://' not in url:
+        url = '//' + url
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    host = (host or '').strip('.')
+    if not host:
+        return None
+    if IP_RE.fullmatch(host):
+        return host
+    return '.'.join(reversed(host.split('.')))
+
+def host_domain(host):
+    """Domínio registrável (empresa.com.br) de um host invertido por reversed_host"""
+    if not host or IP_RE.fullmatch(host):
+        return host
+    labels = host.split('.')
+    size = 3 if len(labels) >= 3 and len(labels[0]) == 2 and labels[1] in SECOND_LEVEL_DOMAINS else 2
+    return '.'.join(reversed(labels[:size]))
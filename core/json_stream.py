@@ -0,0 +1,117 @@
+import codecs
+import json
+
+class JsonStreamReader:
+    """Leitor incremental de JSON para arquivos grandes
+    
+    Lê o arquivo em blocos e decodifica um valor por vez com
+    JSONDecoder.raw_decode, mantendo em memória apenas o bloco atual e o
+    valor sendo lido.
+    """
+    
+    WHITESPACE = ' \t\n\r'
+    
+    def __init__(self, fileobj, chunk_size=1024 * 1024):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+    
+    def _fill(self):
+        """Ler mais um bloco do arquivo; False quando o arquivo terminou"""
+        if self.eof:
+            return False
+        chunk = self.fileobj.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self._text_decoder.decode(b'', final=True)
+        else:
+            self.buffer = self.buffer[self.pos:] + self._text_decoder.decode(chunk)
+        self.pos = 0
+        return True
+    
+    def peek(self):
+        """Próximo caractere significativo (sem consumir); '' no fim do arquivo"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+    
+    def expect(self, char):
+        """Consumir o caractere esperado ou falhar"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'JSON inválido: esperado {char!r}, encontrado {found!r} (byte ~{self.bytes_read})')
+        self.pos += 1
+    
+    def read_value(self):
+        """Decodificar o próximo valor JSON completo"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # Números podem estar cortados no fim do bloco: exigir um caractere depois
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+    
+    def iter_object(self):
+        """Percorrer um objeto JSON, entregando cada chave
+        
+        O chamador deve consumir o valor de cada chave (read_value ou
+        iter_object/iter_array) antes de avançar o iterador.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+    
+    def iter_array(self):
+        """Percorrer um array JSON, entregando cada elemento decodificado"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.read_value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+def iter_categories(fileobj, chunk_size=1024 * 1024):
+    """Percorrer {"categories": {"nome": [item, ...]}} entregando (categoria, item, leitor)
+    
+    Apenas um item fica em memória por vez; o leitor permite acompanhar
+    quantos bytes do arquivo já foram consumidos.
+    """
+    reader = JsonStreamReader(fileobj, chunk_size)
+    for key in reader.iter_object():
+        if key != 'categories':
+            reader.read_value()
+            continue
+        for category_name in reader.iter_object():
+            for item_data in reader.iter_array():
+                yield category_name, item_data, reader
@@ -0,0 +1,247 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from flask import g, request
+from core.config import Config
+
+# Limites (ms) dos buckets dos histogramas de latência por rota
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Comandos que aceitam EXPLAIN QUERY PLAN
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+class QueryProfile:
+    """Consultas SQL de uma requisição: quantidade, tempo e linhas"""
+    
+    def __init__(self, slow_ms, repeat_warning, logger):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.slow_ms = slow_ms
+        self.repeat_warning = repeat_warning
+        self.logger = logger
+        self._statements = {}
+    
+    def count(self, sql):
+        """Registrar uma execução; avisa uma vez quando a mesma SQL se repete demais (N+1)"""
+        self.queries += 1
+        repeats = self._statements.get(sql, 0) + 1
+        self._statements[sql] = repeats
+        if repeats == self.repeat_warning:
+            self.logger.warning(
+                'Consulta repetida %d vezes em %s (possível N+1): %s',
+                repeats, request.path, ' '.join(sql.split())[:300]
+            )
+    
+    def slow_query(self, conn, sql, params, elapsed):
+        """Registrar consulta lenta com o plano de execução"""
+        plan = []
+        if params is not None and sql.lstrip().split(None, 1)[0].upper() in EXPLAINABLE:
+            try:
+                rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, params)
+                plan = [row[3] for row in rows]
+            except sqlite3.Error:
+                pass
+        
+        entry = {
+            'sql': ' '.join(sql.split()),
+            'ms': round(elapsed * 1000, 2),
+            'path': request.path,
+            'plan': plan,
+            'at': time.time(),
+        }
+        with _slow_lock:
+            slow_queries.append(entry)
+        self.logger.warning('Consulta lenta (%.1f ms) em %s: %s | plano: %s',
+                            entry['ms'], entry['path'], entry['sql'][:500], '; '.join(plan))
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor que soma tempo e linhas (execução e leitura) no QueryProfile da conexão
+    
+    O SQLite executa as consultas aos poucos, conforme as linhas são lidas,
+    então o tempo de cada fetch/iteração também conta para a consulta.
+    """
+    
+    def __init__(self, connection, profile):
+        super().__init__(connection)
+        # Connection.cursor() copia o row_factory; criando o cursor direto, não
+        self.row_factory = connection.row_factory
+        self.profile = profile
+        self._sql = None
+        self._params = None
+        self._elapsed = 0.0
+        self._logged_slow = False
+    
+    def _track(self, elapsed, rows=0):
+        profile = self.profile
+        profile.sql_time += elapsed
+        profile.rows += rows
+        self._elapsed += elapsed
+        if not self._logged_slow and self._sql and self._elapsed * 1000 >= profile.slow_ms:
+            self._logged_slow = True
+            profile.slow_query(self.connection, self._sql, self._params, self._elapsed)
+    
+    def _start(self, sql, params):
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._logged_slow = False
+        self.profile.count(sql)
+    
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._track(time.perf_counter() - start, max(self.rowcount, 0))
+    
+    def executemany(self, sql, seq_of_parameters):
+        self._start(sql, None)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._track(time.perf_counter() - start, max(self.rowcount, 0))
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._track(time.perf_counter() - start, row is not None)
+        return row
+    
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._track(time.perf_counter() - start, len(rows))
+        return rows
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._track(time.perf_counter() - start, len(rows))
+        return rows
+    
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._track(time.perf_counter() - start)
+            raise
+        self._track(time.perf_counter() - start, 1)
+        return row
+
+class RouteStats:
+    """Histogramas de latência por rota (em memória, por processo)"""
+    
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+    
+    def record(self, route, total_ms, profile):
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if total_ms <= bound),
+                      len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'queries': 0, 'sql_ms': 0.0, 'rows': 0,
+                    'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            stats['count'] += 1
+            stats['total_ms'] += total_ms
+            stats['max_ms'] = max(stats['max_ms'], total_ms)
+            stats['buckets'][bucket] += 1
+            if profile is not None:
+                stats['queries'] += profile.queries
+                stats['sql_ms'] += profile.sql_time * 1000
+                stats['rows'] += profile.rows
+    
+    def snapshot(self):
+        """Resumo por rota: médias, percentis aproximados (limite do bucket) e histograma"""
+        bounds = list(LATENCY_BUCKETS_MS) + [None]
+        with self._lock:
+            routes = {route: dict(stats, buckets=list(stats['buckets'])) for route, stats in self._routes.items()}
+        
+        result = {}
+        for route, stats in sorted(routes.items()):
+            count = stats['count']
+            result[route] = {
+                'count': count,
+                'avg_ms': round(stats['total_ms'] / count, 2),
+                'max_ms': round(stats['max_ms'], 2),
+                'p50_ms': self._percentile(stats['buckets'], count, 0.50),
+                'p95_ms': self._percentile(stats['buckets'], count, 0.95),
+                'p99_ms': self._percentile(stats['buckets'], count, 0.99),
+                'avg_queries': round(stats['queries'] / count, 2),
+                'avg_sql_ms': round(stats['sql_ms'] / count, 2),
+                'avg_rows': round(stats['rows'] / count, 2),
+                # Contagem por faixa: le_ms é o limite superior (None = acima do último)
+                'histogram': [{'le_ms': bound, 'count': n} for bound, n in zip(bounds, stats['buckets'])],
+            }
+        return result
+    
+    def _percentile(self, buckets, count, fraction):
+        seen = 0
+        for i, bucket_count in enumerate(buckets):
+            seen += bucket_count
+            if seen >= count * fraction:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else None
+        return None
+    
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+route_stats = RouteStats()
+slow_queries = deque(maxlen=Config.SLOW_QUERY_LOG_SIZE)
+_slow_lock = threading.Lock()
+
+def current_profile():
+    """QueryProfile da requisição atual (None com o profiling desligado)"""
+    return g.get('_query_profile')
+
+def profiling_snapshot():
+    """Dados para o endpoint de administração"""
+    with _slow_lock:
+        recent_slow = list(slow_queries)
+    return {'routes': route_stats.snapshot(), 'slow_queries': recent_slow}
+
+def reset_profiling():
+    route_stats.clear()
+    with _slow_lock:
+        slow_queries.clear()
+
+def init_app(app):
+    """Medir cada requisição: consultas SQL, Server-Timing e histogramas por rota"""
+    if not app.config.get('PROFILING_ENABLED', True):
+        return
+    
+    @app.before_request
+    def start_profile():
+        g._request_start = time.perf_counter()
+        g._query_profile = QueryProfile(
+            app.config.get('SLOW_QUERY_MS', 100),
+            app.config.get('QUERY_REPEAT_WARNING', 50),
+            app.logger
+        )
+    
+    @app.after_request
+    def finish_profile(response):
+        start = g.get('_request_start')
+        if start is None:
+            return response
+        total_ms = (time.perf_counter() - start) * 1000
+        profile = g.get('_query_profile')
+        
+        timings = [f'app;dur={total_ms:.1f}']
+        if profile is not None:
+            timings.insert(0, f'db;dur={profile.sql_time * 1000:.1f};desc="{profile.queries} queries, {profile.rows} rows"')
+        response.headers.add('Server-Timing', ', '.join(timings))
+        
+        route = request.url_rule.rule if request.url_rule else 'não encontrada'
+        route_stats.record(f'{request.method} {route}', total_ms, profile)
+        return response
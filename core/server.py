@@ -0,0 +1,43 @@
+from core.db import ensure_schema, reset_pool
+
+def serve(app, host, port, workers, threads):
+    """Servir a aplicação em produção
+    
+    O schema é criado/migrado uma única vez, no processo principal, antes
+    de iniciar os workers. Com gunicorn instalado são usados vários
+    processos com threads (worker gthread); sem ele, cai no servidor
+    multithread do Werkzeug em um único processo.
+    """
+    with app.app_context():
+        ensure_schema()
+        # Conexões SQLite não podem ser herdadas pelos processos filhos
+        reset_pool()
+    
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+    
+    if BaseApplication is None:
+        from werkzeug.serving import run_simple
+        if workers > 1:
+            print('gunicorn não está instalado: servindo com um único processo multithread')
+        run_simple(host, port, app, threaded=True)
+        return
+    
+    class AtlasServer(BaseApplication):
+        """Gunicorn embutido com a configuração da linha de comando"""
+        
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            # Importações rodam em segundo plano; o timeout vale só para requisições
+            self.cfg.set('timeout', 120)
+            self.cfg.set('post_fork', lambda server, worker: reset_pool())
+        
+        def load(self):
+            return app
+    
+    AtlasServer().run()
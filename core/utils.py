@@ -1,6 +1,9 @@
 import os
 import json
+import base64
+import hashlib
 from datetime import datetime
+from markupsafe import Markup, escape
 
 def ensure_dir(path):
     """Garantir que diretório existe"""
@@ -27,6 +30,55 @@ def safe_json_loads(json_string):
     except:
         return {}
 
+def item_hash(category_name, source_file, raw_content):
+    """Hash do conteúdo de um item (categoria, arquivo de origem e conteúdo)"""
+    payload = '\x00'.join([category_name or '', source_file or '', raw_content or ''])
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def entity_hash(kind, value):
+    """Hash de um valor extraído (tipo e valor) para o dicionário entity_values"""
+    payload = '\x00'.join([kind or '', value or ''])
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+def password_hash(password, key):
+    """Hash com chave (blake2b) de uma senha, em hex; sem a chave não dá para testar senhas"""
+    if password is None:
+        return None
+    key = hashlib.blake2b(key.encode('utf-8')).digest()
+    return hashlib.blake2b(password.encode('utf-8'), key=key, digest_size=16).hexdigest()
+
+def highlight_snippet(text, start='\x02', end='\x03'):
+    """Escapar trecho do FTS e converter marcadores de destaque em <mark>"""
+    if not text:
+        return ''
+    html = str(escape(text))
+    html = html.replace(start, '<mark class="bg-yellow-200">').replace(end, '</mark>')
+    return Markup(html)
+
+def encode_cursor(*values):
+    """Codificar valores de paginação (keyset) em um cursor opaco para URLs"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, size=None):
+    """Decodificar cursor gerado por encode_cursor (None se inválido)
+    
+    Os valores vão direto para os parâmetros do SQL: só são aceitos listas
+    de escalares (str, int, float ou None) com size elementos, se informado.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except:
+        return None
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        return None
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        return None
+    return values
+
 def update_env_variable(key, value):
     """Atualizar variável no arquivo .env"""
     env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
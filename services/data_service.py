@@ -1,52 +1,545 @@
-from core.db import get_db_connection
+import json
+import re
+from core.cache import data_cache, bump_data_version
+from core.config import Config
+from core.compression import compress_content, make_preview
+from core.db import get_db_connection, ITEM_CONTENT_SQL, SAVE_CONTENT_SQL
+from core.extraction import ENTITY_TABLES, extract_entities, reversed_host
+from core.minhash import similarity
+from services.extraction_service import replace_entities
+from services.similarity_service import replace_signatures
+from core.utils import encode_cursor, decode_cursor, entity_hash
+
+# Tabelas de ligação item -> valor: (chave no dicionário do item, tabela)
+RELATED_TABLES = [
+    ('passwords', 'passwords'),
+    ('emails', 'emails'),
+    ('urls', 'urls'),
+    ('private_keys', 'private_keys'),
+    ('seeds', 'seeds'),
+]
+
+# Colunas das listagens (o item completo só é lido na página de detalhe)
+LIST_COLUMNS = 'i.id, i.source_file, i.created_at, i.preview, c.name as category_name'
+
+# Ordenação padrão das listagens paginadas: (expressão SQL, chave na linha)
+DEFAULT_PAGE_KEYS = [('i.source_file', 'source_file'), ('i.id', 'id')]
+
+# Outros itens com o mesmo valor, quando já existe uma contagem mantida por triggers
+SHARED_COUNT_SQL = {
+    'passwords': '(SELECT item_count - 1 FROM password_reuse WHERE credential_hash = t.credential_hash)',
+}
+
+# Marcadores dos trechos destacados pelo FTS (convertidos em <mark> no template)
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+# Filtros de campo aceitos na busca (ex.: email:foo@bar) -> tabela; 'host' filtra
+# pelo host das URLs, incluindo subdomínios
+SEARCH_FIELDS = {
+    'dominio': 'host',
+    'domain': 'host',
+    'host': 'host',
+    'email': 'emails',
+    'url': 'urls',
+    'password': 'passwords',
+    'senha': 'passwords',
+    'key': 'private_keys',
+    'chave': 'private_keys',
+    'seed': 'seeds',
+}
+
+def parse_search_query(query):
+    """Separar filtros de campo do texto livre da busca
+    
+    Retorna ([(tabela, valor, exato)], texto): campo:valor casa pelo início
+    do valor e campo:"valor" só com o valor exato.
+    """
+    filters = []
+    
+    def take_filter(match):
+        field = match.group(1).lower()
+        if field not in SEARCH_FIELDS:
+            return match.group(0)
+        exact = match.group(2) is not None
+        value = match.group(2) if exact else match.group(3)
+        if value:
+            filters.append((SEARCH_FIELDS[field], value, exact))
+        return ' '
+    
+    text = re.sub(r'(?<!\S)(\w+):(?:"([^"]*)"|(\S+))', take_filter, query)
+    return filters, text.strip()
+
+def build_fts_query(query):
+    """Converter a busca do usuário em uma expressão FTS5 segura
+    
+    Termos soltos viram buscas por prefixo e trechos entre aspas viram
+    frases exatas; todos os termos precisam estar presentes. Retorna None
+    quando não há nada pesquisável.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        text = phrase or word
+        if not re.search(r'\w', text):
+            continue
+        quoted = '"' + text.replace('"', '""') + '"'
+        terms.append(quoted if phrase else quoted + '*')
+    return ' AND '.join(terms) or None
 
 class DataService:
     """Serviço para operações com dados"""
     
-    def get_dashboard_stats(self):
-        """Estatísticas para o dashboard"""
+    def _load_related(self, conn, item_ids):
+        """Carregar dados relacionados de vários itens com uma consulta por tabela"""
+        related = {item_id: {key: [] for key, _ in RELATED_TABLES} for item_id in item_ids}
+        if not related:
+            return related
+        
+        # Os ids vão como um único parâmetro JSON, evitando o limite de variáveis do SQLite
+        ids_json = json.dumps(list(related))
+        for key, table in RELATED_TABLES:
+            rows = conn.execute(f'''
+                SELECT t.item_id, v.value
+                FROM {table} t
+                JOIN entity_values v ON v.id = t.value_id
+                WHERE t.item_id IN (SELECT value FROM json_each(?))
+                ORDER BY t.id
+            ''', (ids_json,))
+            for item_id, value in rows:
+                related[item_id][key].append(value)
+        
+        return related
+    
+    def _load_counts(self, conn, item_ids):
+        """Quantidade de dados extraídos por tipo de vários itens, em uma consulta agregada"""
+        counts = {item_id: {key: 0 for key, _ in RELATED_TABLES} for item_id in item_ids}
+        if not counts:
+            return counts
+        
+        ids_json = json.dumps(list(counts))
+        sql = ' UNION ALL '.join(f'''
+            SELECT '{key}', item_id, COUNT(*)
+            FROM {table}
+            WHERE item_id IN (SELECT value FROM json_each(:ids))
+            GROUP BY item_id
+        ''' for key, table in RELATED_TABLES)
+        for key, item_id, count in conn.execute(sql, {'ids': ids_json}):
+            counts[item_id][key] = count
+        
+        return counts
+    
+    def _load_shared_counts(self, conn, item_id):
+        """Para cada valor extraído do item, quantos outros itens têm o mesmo valor
+        
+        Retorna {chave: {valor: {'value_id', 'count'}}}; como os valores são únicos em
+        entity_values, cada contagem é uma busca no índice value_id (senhas
+        leem a contagem de password_reuse).
+        """
+        shared = {key: {} for key, _ in RELATED_TABLES}
+        parts = []
+        for key, table in RELATED_TABLES:
+            count_sql = SHARED_COUNT_SQL.get(table) or f'''(
+                SELECT COUNT(DISTINCT o.item_id) FROM {table} o
+                WHERE o.value_id = t.value_id AND o.item_id <> t.item_id
+            )'''
+            parts.append(f'''
+                SELECT '{key}', v.value, t.value_id, {count_sql}
+                FROM {table} t
+                JOIN entity_values v ON v.id = t.value_id
+                WHERE t.item_id = :item_id
+            ''')
+        sql = ' UNION ALL '.join(parts)
+        for key, value, value_id, count in conn.execute(sql, {'item_id': item_id}):
+            shared[key][value] = {'value_id': value_id, 'count': count}
+        return shared
+    
+    def _fetch_page(self, conn, select_sql, params, after=None, before=None, limit=None, keys=None,
+                    descending=False):
+        """Buscar uma página ordenada por keys (padrão: source_file, id) usando paginação keyset"""
+        limit = limit or Config.PAGE_SIZE
+        keys = keys or DEFAULT_PAGE_KEYS
+        columns = ', '.join(expr for expr, _ in keys)
+        backwards = bool(before)
+        cursor = decode_cursor(before if backwards else after, len(keys))
+        # Percorrer em ordem decrescente é inverter o sentido da comparação e da ordenação
+        reverse = backwards != descending
+        
+        sql = select_sql
+        params = tuple(params)
+        if cursor:
+            placeholders = ', '.join('?' for _ in keys)
+            sql += f" AND ({columns}) {'<' if reverse else '>'} ({placeholders})"
+            params += tuple(cursor)
+        else:
+            cursor = None
+        
+        direction = 'DESC' if reverse else 'ASC'
+        sql += ' ORDER BY ' + ', '.join(f'{expr} {direction}' for expr, _ in keys) + ' LIMIT ?'
+        rows = conn.execute(sql, params + (limit + 1,)).fetchall()
+        
+        # Uma linha extra indica se existe mais uma página na direção percorrida
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+        items = [dict(row) for row in rows]
+        
+        page = {'items': items, 'next_cursor': None, 'prev_cursor': None}
+        if items:
+            has_next = True if backwards else has_more
+            has_prev = has_more if backwards else cursor is not None
+            if has_next:
+                page['next_cursor'] = encode_cursor(*(items[-1][key] for _, key in keys))
+            if has_prev:
+                page['prev_cursor'] = encode_cursor(*(items[0][key] for _, key in keys))
+        return page
+    
+    def _entity_item_ids(self, tables, value, exact=False):
+        """SQL com os ids de itens cujos valores extraídos começam com value
+        
+        A comparação por faixa (>= valor, < valor + maior caractere) usa o
+        índice (kind, value) de entity_values e depois o índice value_id da
+        tabela de ligação. Com exact=True o valor é achado pelo hash.
+        """
+        parts = []
+        params = []
+        for table in tables:
+            if exact:
+                parts.append(f'''
+                    SELECT item_id FROM {table}
+                    WHERE value_id = (SELECT id FROM entity_values WHERE hash = ?)
+                ''')
+                params.append(entity_hash(table, value))
+                continue
+            prefixes = [value]
+            # URLs costumam ser digitadas sem o esquema
+            if table == 'urls' and '://' not in value:
+                prefixes += ['http://' + value, 'https://' + value]
+            for prefix in prefixes:
+                parts.append(f'''
+                    SELECT t.item_id FROM entity_values v
+                    JOIN {table} t ON t.value_id = v.id
+                    WHERE v.kind = ? AND v.value >= ? AND v.value < ?
+                ''')
+                params += [table, prefix, prefix + '\U0010ffff']
+        return ' UNION '.join(parts), params
+    
+    def _host_item_ids(self, value, exact=False):
+        """SQL com os ids de itens com URL no host value ou em um subdomínio dele
+        
+        urls.host é invertido (com.example.login), então os subdomínios de
+        example.com são a faixa [com.example., com.example/) do índice. Com
+        exact=True só o próprio host casa.
+        """
+        host = reversed_host(value.strip().lower())
+        if not host:
+            return 'SELECT NULL WHERE 0', []
+        sql = 'SELECT item_id FROM urls WHERE host = ?'
+        params = [host]
+        if not exact:
+            sql += ' UNION SELECT item_id FROM urls WHERE host >= ? AND host < ?'
+            params += [host + '.', host + '/']
+        return sql, params
+    
+    def _refresh_content_hash(self, conn, where_sql, params):
+        """Recalcular content_hash dos itens filtrados por where_sql
+        
+        Um item que passe a ser idêntico a outro já existente fica com hash
+        NULL (duplicado) em vez de violar o índice único.
+        """
+        new_hash = f'''item_hash(
+            (SELECT name FROM categories WHERE id = items.category_id),
+            source_file, {ITEM_CONTENT_SQL}
+        )'''
+        conn.execute(f'UPDATE OR IGNORE items SET content_hash = {new_hash} WHERE {where_sql}', params)
+        conn.execute(f'''
+            UPDATE items SET content_hash = NULL
+            WHERE ({where_sql}) AND content_hash IS NOT {new_hash}
+        ''', params)
+    
+    def remove_duplicates(self, dry_run=False):
+        """Remover itens duplicados direto no SQLite, em uma única transação
+        
+        Itens com mesma categoria, arquivo de origem e conteúdo formam um
+        grupo; o mais antigo (menor id) é mantido, os dados extraídos dos
+        demais passam para ele e valores repetidos dentro de cada item são
+        descartados. Com dry_run=True tudo é executado e desfeito, retornando
+        apenas as contagens.
+        """
+        conn = get_db_connection()
+        counts = {}
+        
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DROP TABLE IF EXISTS temp.duplicate_items')
+            conn.execute('''
+                CREATE TEMP TABLE duplicate_items (
+                    dup_id INTEGER PRIMARY KEY,
+                    keep_id INTEGER NOT NULL
+                )
+            ''')
+            # Só os itens sem content_hash (duplicados) têm o hash recalculado;
+            # os demais usam o hash gravado, sem descomprimir o conteúdo
+            conn.execute(f'''
+                INSERT INTO duplicate_items (dup_id, keep_id)
+                SELECT id, keep_id FROM (
+                    SELECT id, MIN(id) OVER (
+                        PARTITION BY category_id, source_file, COALESCE(content_hash, item_hash(
+                            (SELECT name FROM categories WHERE id = items.category_id),
+                            source_file, {ITEM_CONTENT_SQL}
+                        ))
+                    ) AS keep_id
+                    FROM items
+                )
+                WHERE id <> keep_id
+            ''')
+            counts['groups'] = conn.execute(
+                'SELECT COUNT(DISTINCT keep_id) FROM temp.duplicate_items'
+            ).fetchone()[0]
+            counts['items_removed'] = conn.execute(
+                'SELECT COUNT(*) FROM temp.duplicate_items'
+            ).fetchone()[0]
+            
+            # Dados extraídos dos duplicados passam para o item mantido
+            counts['children_moved'] = 0
+            for _, table in RELATED_TABLES:
+                counts['children_moved'] += conn.execute(f'''
+                    UPDATE {table}
+                    SET item_id = (SELECT keep_id FROM temp.duplicate_items WHERE dup_id = {table}.item_id)
+                    WHERE item_id IN (SELECT dup_id FROM temp.duplicate_items)
+                ''').rowcount
+            
+            # Valores repetidos dentro do mesmo item; fica a ligação do import, se houver
+            counts['children_removed'] = 0
+            for _, table in RELATED_TABLES:
+                counts['children_removed'] += conn.execute(f'''
+                    DELETE FROM {table}
+                    WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY item_id, value_id ORDER BY source = 'regex', id
+                            ) AS n
+                            FROM {table}
+                        )
+                        WHERE n > 1
+                    )
+                ''').rowcount
+            
+            conn.execute('DELETE FROM items WHERE id IN (SELECT dup_id FROM temp.duplicate_items)')
+            conn.execute('DROP TABLE temp.duplicate_items')
+            
+            # Itens que ficaram únicos recebem o hash de conteúdo
+            self._refresh_content_hash(conn, 'content_hash IS NULL', ())
+            bump_data_version(conn)
+            
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+            counts['dry_run'] = dry_run
+            return counts
+        except:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def get_password_reuse(self, after=None, before=None, limit=None, sample_size=None):
+        """Senhas usadas em mais de um item, da mais reutilizada para a menos
+        
+        Cada grupo traz a senha, a quantidade de itens e até sample_size
+        itens. Tudo sai de password_reuse e do índice (credential_hash,
+        item_id), então o custo depende só do tamanho da página.
+        """
+        sample_size = sample_size or Config.REUSE_SAMPLE_ITEMS
         conn = get_db_connection()
         
-        stats = {}
+        page = self._fetch_page(
+            conn, 'SELECT credential_hash, item_count FROM password_reuse r WHERE item_count > 1', (),
+            after, before, limit, keys=[('r.item_count', 'item_count'), ('r.credential_hash', 'credential_hash')],
+            descending=True
+        )
+        groups = {group['credential_hash']: group for group in page['items']}
+        for group in groups.values():
+            group['password'] = None
+            group['value_id'] = None
+            group['items'] = []
+        
+        if groups:
+            rows = conn.execute('''
+                SELECT h.value AS credential_hash, i.id, i.source_file, c.name AS category_name,
+                       p.value_id, (SELECT v.value FROM entity_values v WHERE v.id = p.value_id) AS password
+                FROM json_each(?) h
+                JOIN passwords p ON p.id IN (
+                    SELECT MIN(id) FROM passwords
+                    WHERE credential_hash = h.value
+                    GROUP BY item_id
+                    LIMIT ?
+                )
+                JOIN items i ON i.id = p.item_id
+                JOIN categories c ON i.category_id = c.id
+                ORDER BY i.id
+            ''', (json.dumps(list(groups)), sample_size))
+            for row in rows:
+                group = groups[row['credential_hash']]
+                if group['password'] is None:
+                    group['password'] = row['password']
+                    group['value_id'] = row['value_id']
+                group['items'].append({key: row[key] for key in ('id', 'source_file', 'category_name')})
+        
+        conn.close()
+        return page
+    
+    def get_similar_items(self, item_id, limit=None):
+        """Itens parecidos com o item, do mais para o menos parecido
+        
+        Os candidatos são os itens que dividem buckets LSH com ele (buscas no
+        índice de item_lsh, sem percorrer a base); cada um é confirmado pela
+        similaridade estimada das assinaturas contra SIMILARITY_THRESHOLD.
+        """
+        limit = limit or Config.SIMILAR_ITEMS_LIMIT
+        conn = get_db_connection()
+        
+        try:
+            own = conn.execute('SELECT signature FROM item_signatures WHERE item_id = ?', (item_id,)).fetchone()
+            if not own:
+                return []
+            
+            rows = conn.execute('''
+                SELECT i.id, i.source_file, c.name AS category_name, s.signature
+                FROM (
+                    SELECT o.item_id, COUNT(*) AS shared
+                    FROM item_lsh l
+                    JOIN item_lsh o ON o.bucket = l.bucket AND o.item_id <> l.item_id
+                    WHERE l.item_id = ?
+                    GROUP BY o.item_id
+                    ORDER BY shared DESC
+                    LIMIT ?
+                ) m
+                JOIN item_signatures s ON s.item_id = m.item_id
+                JOIN items i ON i.id = m.item_id
+                JOIN categories c ON i.category_id = c.id
+            ''', (item_id, Config.LSH_MAX_CANDIDATES)).fetchall()
+        finally:
+            conn.close()
+        
+        similar = []
+        for row in rows:
+            score = similarity(own['signature'], row['signature'])
+            if score >= Config.SIMILARITY_THRESHOLD:
+                similar.append({
+                    'id': row['id'],
+                    'source_file': row['source_file'],
+                    'category_name': row['category_name'],
+                    'similarity': score,
+                })
+        similar.sort(key=lambda item: (-item['similarity'], item['id']))
+        return similar[:limit]
+    
+    def get_similar_groups(self, after=None, before=None, limit=None):
+        """Grupos de itens parecidos do último agrupamento (flask similarity), por id do grupo
+        
+        O grupo é identificado pelo item de referência, aquele com que os
+        demais foram comparados em rebuild_groups (também o menor id do
+        grupo); cada item traz a similaridade estimada com ele. built_at
+        indica quando o agrupamento foi calculado (None se nunca foi).
+        """
+        conn = get_db_connection()
         
-        # Total de categorias
-        stats['total_categories'] = conn.execute('SELECT COUNT(*) FROM categories').fetchone()[0]
+        page = self._fetch_page(
+            conn, '''
+                SELECT * FROM (
+                    SELECT group_id, COUNT(*) AS size FROM similar_groups GROUP BY group_id
+                ) g WHERE 1 = 1
+            ''', (), after, before, limit, keys=[('g.group_id', 'group_id')]
+        )
+        groups = {group['group_id']: group for group in page['items']}
+        for group in groups.values():
+            group['items'] = []
         
-        # Total de itens
-        stats['total_items'] = conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+        if groups:
+            rows = conn.execute('''
+                SELECT g.group_id, i.id, i.source_file, c.name AS category_name,
+                       s.signature, ls.signature AS leader_signature
+                FROM similar_groups g
+                JOIN items i ON i.id = g.item_id
+                JOIN categories c ON i.category_id = c.id
+                LEFT JOIN item_signatures s ON s.item_id = g.item_id
+                LEFT JOIN item_signatures ls ON ls.item_id = g.group_id
+                WHERE g.group_id IN (SELECT value FROM json_each(?))
+                ORDER BY g.group_id, i.id
+            ''', (json.dumps(list(groups)),))
+            for row in rows:
+                score = None
+                if row['signature'] and row['leader_signature']:
+                    score = similarity(row['signature'], row['leader_signature'])
+                groups[row['group_id']]['items'].append({
+                    'id': row['id'],
+                    'source_file': row['source_file'],
+                    'category_name': row['category_name'],
+                    'similarity': score,
+                })
         
-        # Total de senhas
-        stats['total_passwords'] = conn.execute('SELECT COUNT(*) FROM passwords').fetchone()[0]
+        built_at = conn.execute(
+            "SELECT value FROM app_settings WHERE name = 'similar_groups_built_at'"
+        ).fetchone()
+        page['built_at'] = built_at[0] if built_at else None
         
-        # Total de emails
-        stats['total_emails'] = conn.execute('SELECT COUNT(*) FROM emails').fetchone()[0]
+        conn.close()
+        return page
+    
+    def get_dashboard_stats(self):
+        """Estatísticas para o dashboard (em cache até a próxima escrita)"""
+        return data_cache.get_or_set('dashboard_stats', self._load_dashboard_stats)
+    
+    def _load_dashboard_stats(self):
+        """Ler estatísticas dos contadores mantidos por triggers"""
+        conn = get_db_connection()
         
-        # Total de chaves privadas
-        stats['total_private_keys'] = conn.execute('SELECT COUNT(*) FROM private_keys').fetchone()[0]
+        counts = {row['name']: row['count'] for row in conn.execute('SELECT name, count FROM table_counts')}
         
-        # Total de seeds
-        stats['total_seeds'] = conn.execute('SELECT COUNT(*) FROM seeds').fetchone()[0]
+        stats = {
+            'total_categories': counts.get('categories', 0),
+            'total_items': counts.get('items', 0),
+            'total_passwords': counts.get('passwords', 0),
+            'total_emails': counts.get('emails', 0),
+            'total_urls': counts.get('urls', 0),
+            'total_private_keys': counts.get('private_keys', 0),
+            'total_seeds': counts.get('seeds', 0),
+        }
         
         # Itens por categoria
         category_stats = conn.execute('''
-            SELECT c.name, COUNT(i.id) as count
+            SELECT c.name, COALESCE(cc.item_count, 0) as count
             FROM categories c
-            LEFT JOIN items i ON c.id = i.category_id
-            GROUP BY c.id, c.name
+            LEFT JOIN category_counts cc ON cc.category_id = c.id
             ORDER BY count DESC
         ''').fetchall()
         
         stats['categories'] = [dict(row) for row in category_stats]
         
+        # Domínios com mais itens (domain_counts é mantida por triggers)
+        stats['top_domains'] = [dict(row) for row in conn.execute('''
+            SELECT domain, item_count as count
+            FROM domain_counts
+            WHERE item_count > 0
+            ORDER BY item_count DESC
+            LIMIT ?
+        ''', (Config.TOP_DOMAINS,))]
+        
         conn.close()
         return stats
     
     def get_recent_items(self, limit=10):
-        """Itens mais recentes"""
+        """Itens mais recentes (em cache até a próxima escrita)"""
+        return data_cache.get_or_set(('recent_items', limit), lambda: self._load_recent_items(limit))
+    
+    def _load_recent_items(self, limit):
+        """Consultar itens mais recentes"""
         conn = get_db_connection()
         
-        items = conn.execute('''
-            SELECT i.*, c.name as category_name
+        items = conn.execute(f'''
+            SELECT {LIST_COLUMNS}
             FROM items i
             JOIN categories c ON i.category_id = c.id
             ORDER BY i.created_at DESC
@@ -57,13 +550,14 @@ class DataService:
         return [dict(row) for row in items]
     
     def get_item_by_id(self, item_id):
-        """Buscar item específico por ID"""
+        """Buscar item específico por ID, com o conteúdo completo descomprimido"""
         conn = get_db_connection()
         
         item = conn.execute('''
-            SELECT i.*, c.name as category_name
+            SELECT i.*, c.name as category_name, item_content(ic.codec, ic.data) as raw_content
             FROM items i
             JOIN categories c ON i.category_id = c.id
+            LEFT JOIN item_contents ic ON ic.item_id = i.id
             WHERE i.id = ?
         ''', (item_id,)).fetchone()
         
@@ -72,22 +566,8 @@ class DataService:
             return None
         
         item_dict = dict(item)
-        
-        # Buscar dados relacionados
-        passwords = conn.execute('SELECT password FROM passwords WHERE item_id = ?', (item_id,)).fetchall()
-        item_dict['passwords'] = [row[0] for row in passwords]
-        
-        emails = conn.execute('SELECT email FROM emails WHERE item_id = ?', (item_id,)).fetchall()
-        item_dict['emails'] = [row[0] for row in emails]
-        
-        urls = conn.execute('SELECT url FROM urls WHERE item_id = ?', (item_id,)).fetchall()
-        item_dict['urls'] = [row[0] for row in urls]
-        
-        keys = conn.execute('SELECT key_value FROM private_keys WHERE item_id = ?', (item_id,)).fetchall()
-        item_dict['private_keys'] = [row[0] for row in keys]
-        
-        seeds = conn.execute('SELECT seed_phrase FROM seeds WHERE item_id = ?', (item_id,)).fetchall()
-        item_dict['seeds'] = [row[0] for row in seeds]
+        item_dict.update(self._load_related(conn, [item_id])[item_id])
+        item_dict['shared'] = self._load_shared_counts(conn, item_id)
         
         conn.close()
         return item_dict
@@ -97,12 +577,23 @@ class DataService:
         conn = get_db_connection()
         
         try:
+            old = conn.execute('''
+                SELECT item_content(codec, data) FROM item_contents WHERE item_id = ?
+            ''', (item_id,)).fetchone()
             conn.execute('''
                 UPDATE items 
-                SET source_file = ?, raw_content = ?
+                SET source_file = ?, preview = ?
                 WHERE id = ?
-            ''', (data['source_file'], data['raw_content'], item_id))
+            ''', (data['source_file'], make_preview(data['raw_content']), item_id))
+            conn.execute(SAVE_CONTENT_SQL, (item_id, *compress_content(data['raw_content'])))
             
+            # Dados extraídos só são refeitos quando o conteúdo muda
+            if old is None or old[0] != data['raw_content']:
+                replace_entities(conn, {item_id: extract_entities(data['raw_content'])})
+                replace_signatures(conn, {item_id: data['raw_content']})
+            self._refresh_content_hash(conn, 'id = ?', (item_id,))
+            
+            bump_data_version(conn)
             conn.commit()
             conn.close()
             return True
@@ -113,54 +604,81 @@ class DataService:
     
     def delete_item(self, item_id):
         """Remover item e todos os dados relacionados"""
+        return self.delete_items([item_id]) > 0
+    
+    def delete_items(self, item_ids):
+        """Remover vários itens e seus dados relacionados em uma única transação
+        
+        Retorna a quantidade de itens efetivamente removidos (0 em caso de erro).
+        """
+        if not item_ids:
+            return 0
+        
         conn = get_db_connection()
+        ids_json = json.dumps([int(item_id) for item_id in item_ids])
         
         try:
-            # Remover dados relacionados
-            conn.execute('DELETE FROM passwords WHERE item_id = ?', (item_id,))
-            conn.execute('DELETE FROM emails WHERE item_id = ?', (item_id,))
-            conn.execute('DELETE FROM urls WHERE item_id = ?', (item_id,))
-            conn.execute('DELETE FROM private_keys WHERE item_id = ?', (item_id,))
-            conn.execute('DELETE FROM seeds WHERE item_id = ?', (item_id,))
-            
-            # Remover item
-            conn.execute('DELETE FROM items WHERE id = ?', (item_id,))
+            # Dados extraídos saem por ON DELETE CASCADE e o conteúdo por trigger
+            deleted = conn.execute(
+                'DELETE FROM items WHERE id IN (SELECT value FROM json_each(?))',
+                (ids_json,)
+            ).rowcount
             
+            bump_data_version(conn)
             conn.commit()
-            conn.close()
-            return True
-        except:
+            return deleted
+        except Exception as e:
             conn.rollback()
+            print(f"Erro ao remover itens: {e}")
+            return 0
+        finally:
             conn.close()
-            return False
     
     def update_item_category(self, item_id, category_name):
         """Atualizar categoria de um item"""
+        return self.move_items([item_id], category_name) > 0
+    
+    def move_items(self, item_ids, category_name):
+        """Mover vários itens para uma categoria (criada se preciso) em uma única transação
+        
+        Retorna a quantidade de itens movidos (0 em caso de erro).
+        """
+        if not item_ids:
+            return 0
+        
+        conn = get_db_connection()
+        ids_json = json.dumps([int(item_id) for item_id in item_ids])
+        
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
             # Buscar ou criar categoria
-            cursor.execute('SELECT id FROM categories WHERE name = ?', (category_name,))
-            category = cursor.fetchone()
+            category = conn.execute('SELECT id FROM categories WHERE name = ?', (category_name,)).fetchone()
             
-            if not category:
-                # Criar nova categoria
-                cursor.execute('INSERT INTO categories (name) VALUES (?)', (category_name,))
-                category_id = cursor.lastrowid
-            else:
+            if category:
                 category_id = category[0]
+            else:
+                # Criar nova categoria
+                category_id = conn.execute('''
+                    INSERT INTO categories (name, created_at)
+                    VALUES (?, datetime('now'))
+                ''', (category_name,)).lastrowid
             
-            # Atualizar item
-            cursor.execute('UPDATE items SET category_id = ? WHERE id = ?', (category_id, item_id))
+            # Atualizar itens
+            moved = conn.execute('''
+                UPDATE items
+                SET category_id = ?
+                WHERE id IN (SELECT value FROM json_each(?))
+            ''', (category_id, ids_json)).rowcount
+            self._refresh_content_hash(conn, 'id IN (SELECT value FROM json_each(?))', (ids_json,))
             
+            bump_data_version(conn)
             conn.commit()
-            conn.close()
-            return True
-        except:
+            return moved
+        except Exception as e:
             conn.rollback()
+            print(f"Erro ao mover itens: {e}")
+            return 0
+        finally:
             conn.close()
-            return False
     
     def create_item(self, data):
         """Criar novo item"""
@@ -185,10 +703,16 @@ class DataService:
             
             # Inserir item
             cursor.execute('''
-                INSERT INTO items (source_file, raw_content, category_id, created_at)
+                INSERT INTO items (source_file, preview, category_id, created_at)
                 VALUES (?, ?, ?, datetime('now'))
-            ''', (data['source_file'], data['raw_content'], category_id))
+            ''', (data['source_file'], make_preview(data['raw_content']), category_id))
+            item_id = cursor.lastrowid
+            conn.execute(SAVE_CONTENT_SQL, (item_id, *compress_content(data['raw_content'])))
+            replace_entities(conn, {item_id: extract_entities(data['raw_content'])})
+            replace_signatures(conn, {item_id: data['raw_content']})
+            self._refresh_content_hash(conn, 'id = ?', (item_id,))
             
+            bump_data_version(conn)
             conn.commit()
             return True
         except Exception as e:
@@ -198,16 +722,19 @@ class DataService:
             conn.close()
     
     def get_categories(self):
-        """Buscar todas as categorias"""
+        """Buscar todas as categorias (em cache até a próxima escrita)"""
+        return data_cache.get_or_set('categories', self._load_categories)
+    
+    def _load_categories(self):
+        """Consultar categorias com a quantidade de itens"""
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
             
             cursor.execute('''
-                SELECT c.name, COUNT(i.id) as count
+                SELECT c.name, COALESCE(cc.item_count, 0) as count
                 FROM categories c
-                LEFT JOIN items i ON c.id = i.category_id
-                GROUP BY c.id, c.name
+                LEFT JOIN category_counts cc ON cc.category_id = c.id
                 ORDER BY c.name
             ''')
             
@@ -227,95 +754,177 @@ class DataService:
     
     def move_item_category(self, item_id, new_category):
         """Mover item para nova categoria"""
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Primeiro, verificar se a categoria existe ou criar uma nova
-            cursor.execute('SELECT id FROM categories WHERE name = ?', (new_category,))
-            category_row = cursor.fetchone()
-            
-            if category_row:
-                category_id = category_row[0]
-            else:
-                # Criar nova categoria
-                cursor.execute('''
-                    INSERT INTO categories (name, created_at) 
-                    VALUES (?, datetime('now'))
-                ''', (new_category,))
-                category_id = cursor.lastrowid
-            
-            # Atualizar o item com a nova categoria
-            cursor.execute('''
-                UPDATE items 
-                SET category_id = ?
-                WHERE id = ?
-            ''', (category_id, item_id))
-            
-            conn.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            print(f"Erro ao mover item: {e}")
-            return False
-        finally:
-            conn.close()
+        return self.move_items([item_id], new_category) > 0
     
-    def get_items_by_category(self, category_name):
-        """Itens de uma categoria específica"""
+    def get_items_by_category(self, category_name, after=None, before=None, limit=None):
+        """Itens de uma categoria específica, paginados por cursor"""
+        return self.list_items(category_name, after, before, limit)
+    
+    def list_items(self, category_name=None, after=None, before=None, limit=None,
+                   with_related=False, with_content=False):
+        """Itens (opcionalmente de uma categoria) paginados por cursor
+        
+        As listagens trazem só as colunas exibidas, a prévia do conteúdo e a
+        quantidade de dados extraídos por tipo (counts); with_related=True
+        carrega as listas de valores e with_content=True o texto completo.
+        """
         conn = get_db_connection()
         
-        items = conn.execute('''
-            SELECT i.*, c.name as category_name
+        sql = f'''
+            SELECT {LIST_COLUMNS}
             FROM items i
             JOIN categories c ON i.category_id = c.id
-            WHERE c.name = ?
-            ORDER BY i.source_file
-        ''', (category_name,)).fetchall()
+            WHERE 1 = 1
+        '''
+        params = ()
+        if category_name is not None:
+            sql += ' AND c.name = ?'
+            params = (category_name,)
+        page = self._fetch_page(conn, sql, params, after, before, limit)
         
-        # Buscar dados relacionados para cada item
-        result = []
-        for item in items:
-            item_dict = dict(item)
-            
-            # Senhas
-            passwords = conn.execute('SELECT password FROM passwords WHERE item_id = ?', (item['id'],)).fetchall()
-            item_dict['passwords'] = [row[0] for row in passwords]
-            
-            # Emails
-            emails = conn.execute('SELECT email FROM emails WHERE item_id = ?', (item['id'],)).fetchall()
-            item_dict['emails'] = [row[0] for row in emails]
-            
-            # URLs
-            urls = conn.execute('SELECT url FROM urls WHERE item_id = ?', (item['id'],)).fetchall()
-            item_dict['urls'] = [row[0] for row in urls]
-            
-            # Chaves privadas
-            keys = conn.execute('SELECT key_value FROM private_keys WHERE item_id = ?', (item['id'],)).fetchall()
-            item_dict['private_keys'] = [row[0] for row in keys]
-            
-            # Seeds
-            seeds = conn.execute('SELECT seed_phrase FROM seeds WHERE item_id = ?', (item['id'],)).fetchall()
-            item_dict['seeds'] = [row[0] for row in seeds]
-            
-            result.append(item_dict)
+        # Buscar dados relacionados de todos os itens da página em lote
+        self._attach_related(conn, page['items'], with_related)
+        if with_content:
+            self._attach_content(conn, page['items'])
         
         conn.close()
-        return result
+        return page
     
-    def search_items(self, query):
-        """Busca global nos itens"""
+    def get_value_items(self, value_id, after=None, before=None, limit=None):
+        """Itens que contêm um valor extraído de entity_values, paginados por cursor
+        
+        Os links usam o id do valor, para que senhas e outros dados não
+        apareçam em URLs (logs, histórico, Referer). Retorna None se o valor
+        não existir; a página traz kind e value para exibição.
+        """
         conn = get_db_connection()
         
-        search_term = f'%{query}%'
+        value = conn.execute('SELECT kind, value FROM entity_values WHERE id = ?', (value_id,)).fetchone()
+        if not value or value['kind'] not in ENTITY_TABLES:
+            conn.close()
+            return None
         
-        items = conn.execute('''
-            SELECT DISTINCT i.*, c.name as category_name
+        page = self._fetch_page(conn, f'''
+            SELECT {LIST_COLUMNS}
             FROM items i
             JOIN categories c ON i.category_id = c.id
-            WHERE i.source_file LIKE ? OR i.raw_content LIKE ?
-            ORDER BY i.source_file
-            LIMIT 50
-        ''', (search_term, search_term)).fetchall()
+            WHERE i.id IN (SELECT item_id FROM {value['kind']} WHERE value_id = ?)
+        ''', (value_id,), after, before, limit)
+        self._attach_related(conn, page['items'], with_values=False)
+        page['kind'] = value['kind']
+        page['value'] = value['value']
         
         conn.close()
-        return [dict(row) for row in items]
\ No newline at end of file
+        return page
+    
+    def _attach_related(self, conn, items, with_values=True):
+        """Adicionar quantidades (e, com with_values, os valores) dos dados extraídos"""
+        item_ids = [item['id'] for item in items]
+        if with_values:
+            related = self._load_related(conn, item_ids)
+            for item in items:
+                item.update(related[item['id']])
+                item['counts'] = {key: len(related[item['id']][key]) for key, _ in RELATED_TABLES}
+        else:
+            counts = self._load_counts(conn, item_ids)
+            for item in items:
+                item['counts'] = counts[item['id']]
+    
+    def _attach_content(self, conn, items):
+        """Adicionar o conteúdo completo (descomprimido) aos itens de uma página"""
+        rows = conn.execute('''
+            SELECT item_id, item_content(codec, data)
+            FROM item_contents
+            WHERE item_id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps([item['id'] for item in items]),))
+        contents = dict(rows.fetchall())
+        for item in items:
+            item['raw_content'] = contents.get(item['id'])
+    
+    def search_items(self, query, after=None, before=None, limit=None, category_name=None,
+                     with_related=False, with_content=False):
+        """Busca global nos itens e nos dados extraídos, paginada por cursor
+        
+        O texto livre usa o índice FTS5 (ordenado por bm25) e também casa com
+        o início de emails, URLs, senhas, chaves e seeds; filtros campo:valor
+        restringem o resultado aos itens que possuem aquele valor extraído.
+        """
+        filters, text = parse_search_query(query)
+        fts_query = build_fts_query(text)
+        if not fts_query and not filters:
+            return {'items': [], 'next_cursor': None, 'prev_cursor': None}
+        
+        conn = get_db_connection()
+        
+        filter_sql = ''
+        filter_params = []
+        for table, value, exact in filters:
+            if table == 'host':
+                sub_sql, sub_params = self._host_item_ids(value, exact)
+            else:
+                sub_sql, sub_params = self._entity_item_ids([table], value, exact)
+            filter_sql += f' AND i.id IN ({sub_sql})'
+            filter_params += sub_params
+        if category_name is not None:
+            filter_sql += ' AND c.name = ?'
+            filter_params.append(category_name)
+        
+        if fts_query:
+            # Itens achados só pelos dados extraídos entram depois dos do FTS (score 0)
+            entity_sql, entity_params = self._entity_item_ids(ENTITY_TABLES, text.replace('"', ''))
+            # Nome do arquivo pesa o dobro do conteúdo na relevância
+            inner_sql = f'''
+                SELECT {LIST_COLUMNS},
+                       bm25(items_fts, 2.0, 1.0) as score,
+                       snippet(items_fts, 1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 32) as snippet
+                FROM items_fts
+                JOIN items i ON i.id = items_fts.rowid
+                JOIN categories c ON i.category_id = c.id
+                WHERE items_fts MATCH ?{filter_sql}
+                UNION ALL
+                SELECT {LIST_COLUMNS}, 0.0 as score, NULL as snippet
+                FROM items i
+                JOIN categories c ON i.category_id = c.id
+                WHERE i.id IN ({entity_sql})
+                  AND i.id NOT IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?){filter_sql}
+            '''
+            params = [fts_query] + filter_params + entity_params + [fts_query] + filter_params
+        else:
+            inner_sql = f'''
+                SELECT {LIST_COLUMNS}, 0.0 as score, NULL as snippet
+                FROM items i
+                JOIN categories c ON i.category_id = c.id
+                WHERE 1 = 1{filter_sql}
+            '''
+            params = filter_params
+        
+        page = self._fetch_page(
+            conn, f'SELECT * FROM ({inner_sql}) s WHERE 1 = 1', params,
+            after, before, limit, keys=[('s.score', 'score'), ('s.id', 'id')]
+        )
+        self._attach_related(conn, page['items'], with_related)
+        if with_content:
+            self._attach_content(conn, page['items'])
+        
+        conn.close()
+        return page
+    
+    def iter_items(self, category_name=None, query=None, chunk_size=1000):
+        """Percorrer todos os itens do filtro em blocos, com dados relacionados e conteúdo
+        
+        Usa a mesma paginação por cursor das listagens, então a memória fica
+        limitada a um bloco por vez independentemente do total exportado.
+        """
+        cursor = None
+        while True:
+            if query:
+                page = self.search_items(query, after=cursor, limit=chunk_size, category_name=category_name,
+                                         with_related=True, with_content=True)
+            else:
+                page = self.list_items(category_name, after=cursor, limit=chunk_size,
+                                       with_related=True, with_content=True)
+            for item in page['items']:
+                yield item
+            cursor = page['next_cursor']
+            if not cursor:
+                return
\ No newline at end of file
@@ -0,0 +1,111 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from core.cache import bump_data_version
+from core.compression import decompress_content
+from core.config import Config
+from core.db import get_db_connection, insert_entities
+from core.extraction import ENTITY_TABLES, extract_entities
+
+def replace_entities(conn, entities_by_item):
+    """Regravar os dados extraídos de vários itens: {item_id: {tabela: [valores]}}
+    
+    Só as ligações de origem 'regex' são trocadas; as que vieram do
+    extracted_info do import ficam, e valores que já estão nelas não são
+    repetidos. Não faz commit; roda dentro da transação do chamador.
+    """
+    if not entities_by_item:
+        return 0
+    ids_json = json.dumps(list(entities_by_item))
+    for table in ENTITY_TABLES:
+        conn.execute(f'''
+            DELETE FROM {table}
+            WHERE item_id IN (SELECT value FROM json_each(?)) AND source = 'regex'
+        ''', (ids_json,))
+    return insert_entities(conn, {
+        table: [
+            (item_id, value)
+            for item_id, entities in entities_by_item.items()
+            for value in entities.get(table, [])
+        ]
+        for table in ENTITY_TABLES
+    }, 'regex')
+
+def _extract_chunk(rows):
+    """Extrair entidades de (item_id, codec, data); roda nos processos do pool"""
+    return [(item_id, extract_entities(decompress_content(codec, data))) for item_id, codec, data in rows]
+
+class ExtractionService:
+    """Extração de entidades do conteúdo dos itens em lote"""
+    
+    def __init__(self, batch_size=None, workers=None):
+        self.batch_size = batch_size or Config.EXTRACTION_BATCH_SIZE
+        self.workers = workers or os.cpu_count() or 1
+    
+    def _next_chunk(self, conn, last_id, only_missing):
+        """Próximo bloco de itens (por id) a processar
+        
+        Itens com dados do extracted_info do import ficam de fora mesmo com
+        only_missing desligado: o import é a fonte desses itens.
+        """
+        sql = '''
+            SELECT ic.item_id, ic.codec, ic.data
+            FROM item_contents ic
+            WHERE ic.item_id > ?
+        '''
+        condition = '' if only_missing else " AND source = 'import'"
+        sql += ''.join(
+            f' AND NOT EXISTS (SELECT 1 FROM {table} WHERE item_id = ic.item_id{condition})'
+            for table in ENTITY_TABLES
+        )
+        sql += ' ORDER BY ic.item_id LIMIT ?'
+        return [tuple(row) for row in conn.execute(sql, (last_id, self.batch_size))]
+    
+    def backfill(self, only_missing=True, progress=None):
+        """Extrair entidades dos itens que não têm nenhuma (ou de todos sem
+        dados do import)
+        
+        Blocos de itens são lidos por id e distribuídos entre processos; o
+        processo principal grava cada resultado em uma transação própria,
+        com no máximo workers * 2 blocos em andamento para manter a memória
+        limitada. progress(items, rows) é chamado após cada bloco gravado.
+        """
+        conn = get_db_connection()
+        start = time.perf_counter()
+        totals = {'items': 0, 'rows': 0}
+        
+        def write(results):
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = replace_entities(conn, dict(results))
+                bump_data_version(conn)
+                conn.commit()
+            except:
+                conn.rollback()
+                raise
+            totals['items'] += len(results)
+            totals['rows'] += rows
+            if progress:
+                progress(totals['items'], totals['rows'])
+        
+        try:
+            last_id = 0
+            pending = []
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                while True:
+                    chunk = self._next_chunk(conn, last_id, only_missing)
+                    if chunk:
+                        last_id = chunk[-1][0]
+                        pending.append(pool.submit(_extract_chunk, chunk))
+                    if pending and (not chunk or len(pending) >= self.workers * 2):
+                        write(pending.pop(0).result())
+                    if not chunk and not pending:
+                        break
+        finally:
+            conn.close()
+        
+        elapsed = time.perf_counter() - start
+        totals['seconds'] = round(elapsed, 2)
+        totals['items_per_second'] = round(totals['items'] / elapsed, 1) if elapsed else 0.0
+        return totals
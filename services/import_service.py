@@ -1,77 +1,435 @@
 import json
-from core.db import get_db_connection
+import os
+import threading
+import time
+import uuid
+from core.cache import bump_data_version
+from core.compression import compress_content, make_preview
+from core.config import Config
+from core.db import get_db_connection, insert_entities, SAVE_CONTENT_SQL
+from core.extraction import extract_entities
+from core.json_stream import iter_categories
+from core.utils import item_hash
+from services.similarity_service import delete_signatures, replace_signatures
+
+# Listas de extracted_info -> tabela
+EXTRACTED_FIELDS = [
+    ('possible_passwords', 'passwords'),
+    ('emails', 'emails'),
+    ('urls', 'urls'),
+    ('possible_private_keys', 'private_keys'),
+    ('possible_seed', 'seeds'),
+]
+
+# Jobs de importação em segundo plano: job_id -> ImportProgress
+_jobs = {}
+_jobs_lock = threading.Lock()
+MAX_FINISHED_JOBS = 20
+STALE_JOB_SECONDS = 300  # job 'running' sem atualização há mais tempo foi interrompido
+
+class ImportProgress:
+    """Progresso de uma importação, consultável de outra thread"""
+    
+    def __init__(self, total_bytes=0, job_id=None):
+        self._lock = threading.Lock()
+        self.job_id = job_id
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.items = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.rows = 0
+        self.status = 'running'
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+    
+    def update(self, rows, bytes_read, inserted=0, updated=0, skipped=0):
+        with self._lock:
+            self.items += inserted + updated + skipped
+            self.inserted += inserted
+            self.updated += updated
+            self.skipped += skipped
+            self.rows += rows
+            self.bytes_read = bytes_read
+    
+    def finish(self, status='success', error=None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+    
+    def snapshot(self):
+        """Estado atual com taxa (linhas/s) e ETA estimada pelos bytes lidos"""
+        with self._lock:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            rate = self.rows / elapsed if elapsed > 0 else 0.0
+            eta = None
+            if self.status == 'running' and self.bytes_read and self.total_bytes:
+                bytes_rate = self.bytes_read / elapsed if elapsed > 0 else 0
+                if bytes_rate:
+                    eta = max(self.total_bytes - self.bytes_read, 0) / bytes_rate
+            return {
+                'status': self.status,
+                'error': self.error,
+                'items': self.items,
+                'inserted': self.inserted,
+                'updated': self.updated,
+                'skipped': self.skipped,
+                'rows': self.rows,
+                'bytes_read': self.bytes_read,
+                'total_bytes': self.total_bytes,
+                'elapsed': round(elapsed, 2),
+                'rows_per_second': round(rate, 1),
+                'eta_seconds': round(eta, 1) if eta is not None else None,
+            }
 
 class ImportService:
     """Serviço para importar dados do JSON original"""
     
-    def import_from_json(self, json_path):
-        """Importar dados do arquivo JSON"""
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or Config.IMPORT_BATCH_SIZE
+        self.progress = None
+        self._category_ids = {}
+        self._first_id = None
+        self._updated_ids = set()
+    
+    def import_from_json(self, json_path, progress=None):
+        """Importar dados do arquivo JSON em lotes
+        
+        O arquivo é lido em streaming e cada lote de itens é gravado com
+        executemany em uma transação própria, mantendo a memória limitada ao
+        tamanho do lote. Se progress for informado, é atualizado a cada lote.
+        
+        A importação é idempotente: itens com o mesmo content_hash já gravados
+        são ignorados, e um item cujo (categoria, arquivo de origem) identifica
+        um único item existente com conteúdo diferente é atualizado no lugar,
+        desde que o conteúdo gravado não apareça em nenhum ponto do arquivo.
+        Para isso, com itens já no banco, o arquivo é lido uma vez antes só
+        para calcular os hashes.
+        """
+        self.progress = progress or ImportProgress(os.path.getsize(json_path))
+        self._category_ids = {}
+        self._first_id = None
+        self._updated_ids = set()
         
         conn = get_db_connection()
-        imported_count = 0
+        batch = []
         
         try:
-            # Processar cada categoria
-            for category_name, items in data.get('categories', {}).items():
-                # Criar categoria se não existir
-                category_id = self._get_or_create_category(conn, category_name)
+            self._load_incoming_hashes(conn, json_path)
+            with open(json_path, 'rb') as f:
+                for category_name, item_data, reader in iter_categories(f):
+                    batch.append((category_name, item_data))
+                    if len(batch) >= self.batch_size:
+                        self._write_batch(conn, batch, reader.bytes_read)
+                        batch = []
                 
-                # Processar itens da categoria
-                for item_data in items:
-                    item_id = self._create_item(conn, category_id, item_data)
-                    self._process_extracted_info(conn, item_id, item_data.get('extracted_info', {}))
-                    imported_count += 1
-            
-            conn.commit()
-            return {'imported': imported_count, 'status': 'success'}
+                if batch:
+                    self._write_batch(conn, batch, reader.bytes_read)
             
+            self.progress.finish()
+            save_job_progress(conn, self.progress)
+            snapshot = self.progress.snapshot()
+            return {
+                'imported': snapshot['inserted'],
+                'updated': snapshot['updated'],
+                'skipped': snapshot['skipped'],
+                'rows': snapshot['rows'],
+                'rows_per_second': snapshot['rows_per_second'],
+                'status': 'success'
+            }
+        
         except Exception as e:
             conn.rollback()
+            self.progress.finish('error', str(e))
+            save_job_progress(conn, self.progress)
             raise e
         finally:
+            conn.execute('DROP TABLE IF EXISTS temp.incoming_hashes')
             conn.close()
     
+    def _load_incoming_hashes(self, conn, json_path):
+        """Gravar em temp.incoming_hashes o content_hash de todos os itens do arquivo
+        
+        Um item existente cujo hash aparece no arquivo continua valendo e não
+        pode ser atualizado no lugar por outro item com o mesmo (categoria,
+        arquivo de origem), esteja ele antes ou depois no arquivo. Com o banco
+        vazio não há o que atualizar e a leitura extra é dispensada.
+        """
+        conn.execute('DROP TABLE IF EXISTS temp.incoming_hashes')
+        conn.execute('CREATE TEMP TABLE incoming_hashes (hash TEXT PRIMARY KEY) WITHOUT ROWID')
+        if conn.execute('SELECT 1 FROM items LIMIT 1').fetchone() is None:
+            return
+        
+        insert_sql = 'INSERT OR IGNORE INTO temp.incoming_hashes (hash) VALUES (?)'
+        hashes = []
+        with open(json_path, 'rb') as f:
+            for category_name, item_data, _ in iter_categories(f):
+                hashes.append((item_hash(
+                    category_name, item_data.get('source_file', ''), item_data.get('raw_content', '')
+                ),))
+                if len(hashes) >= self.batch_size:
+                    conn.executemany(insert_sql, hashes)
+                    hashes = []
+        conn.executemany(insert_sql, hashes)
+        conn.commit()
+    
+    def _write_batch(self, conn, batch, bytes_read):
+        """Gravar um lote de itens e dados extraídos em uma única transação"""
+        conn.execute('BEGIN IMMEDIATE')
+        
+        # Com o lock de escrita garantido, os ids podem ser reservados de antemão
+        next_id = conn.execute('''
+            SELECT MAX(
+                COALESCE((SELECT MAX(id) FROM items), 0),
+                COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'items'), 0)
+            )
+        ''').fetchone()[0] + 1
+        if self._first_id is None:
+            self._first_id = next_id
+        
+        entries = []
+        for category_name, item_data in batch:
+            source_file = item_data.get('source_file', '')
+            raw_content = item_data.get('raw_content', '')
+            entries.append({
+                'category_id': self._get_or_create_category(conn, category_name),
+                'source_file': source_file,
+                'raw_content': raw_content,
+                'content_hash': item_hash(category_name, source_file, raw_content),
+                'extracted_info': self._extracted_info(item_data, raw_content),
+                'source': 'import' if 'extracted_info' in item_data else 'regex',
+            })
+        
+        # Itens sem alteração (mesmo hash no banco ou repetidos no lote) são ignorados
+        seen = {row[0] for row in conn.execute('''
+            SELECT content_hash FROM items
+            WHERE content_hash IN (SELECT value FROM json_each(?))
+        ''', (json.dumps([entry['content_hash'] for entry in entries]),))}
+        fresh = []
+        for entry in entries:
+            if entry['content_hash'] not in seen:
+                seen.add(entry['content_hash'])
+                fresh.append(entry)
+        skipped = len(entries) - len(fresh)
+        
+        existing = self._find_updatable(conn, fresh)
+        item_rows = []
+        update_rows = []
+        content_rows = []
+        child_rows = {source: {table: [] for _, table in EXTRACTED_FIELDS} for source in ('import', 'regex')}
+        for entry in fresh:
+            key = (entry['category_id'], entry['source_file'])
+            if key in existing:
+                item_id = existing[key]
+                self._updated_ids.add(item_id)
+                update_rows.append((make_preview(entry['raw_content']), entry['content_hash'], item_id))
+            else:
+                item_id = next_id
+                next_id += 1
+                item_rows.append((
+                    item_id, entry['category_id'], entry['source_file'],
+                    make_preview(entry['raw_content']), entry['content_hash']
+                ))
+            content_rows.append((item_id, *compress_content(entry['raw_content'])))
+            for field, table in EXTRACTED_FIELDS:
+                for value in entry['extracted_info'].get(field) or []:
+                    child_rows[entry['source']][table].append((item_id, value))
+        
+        if update_rows:
+            conn.executemany(
+                'UPDATE items SET preview = ?, content_hash = ? WHERE id = ?',
+                update_rows
+            )
+            # Dados extraídos dos itens alterados são regravados do zero
+            updated_json = json.dumps([row[2] for row in update_rows])
+            for _, table in EXTRACTED_FIELDS:
+                conn.execute(
+                    f'DELETE FROM {table} WHERE item_id IN (SELECT value FROM json_each(?))',
+                    (updated_json,)
+                )
+        
+        conn.executemany('''
+            INSERT INTO items (id, category_id, source_file, preview, content_hash)
+            VALUES (?, ?, ?, ?, ?)
+        ''', item_rows)
+        # Conteúdo comprimido depois dos itens (o trigger do FTS lê o source_file)
+        conn.executemany(SAVE_CONTENT_SQL, content_rows)
+        
+        rows = len(item_rows) + len(update_rows)
+        for source, rows_by_table in child_rows.items():
+            rows += insert_entities(conn, rows_by_table, source)
+        
+        if Config.SIMILARITY_ON_IMPORT:
+            replace_signatures(conn, {row[0]: entry['raw_content'] for row, entry in zip(content_rows, fresh)})
+        elif update_rows:
+            # Assinaturas antigas saem; flask similarity gera as novas
+            delete_signatures(conn, [row[2] for row in update_rows])
+        
+        bump_data_version(conn)
+        conn.commit()
+        self.progress.update(rows, bytes_read, len(item_rows), len(update_rows), skipped)
+        save_job_progress(conn, self.progress)
+    
+    def _extracted_info(self, item_data, raw_content):
+        """extracted_info do JSON ou, quando o item não traz nenhum, extraído do conteúdo"""
+        if 'extracted_info' in item_data:
+            return item_data['extracted_info'] or {}
+        entities = extract_entities(raw_content)
+        return {field: entities[table] for field, table in EXTRACTED_FIELDS}
+    
+    def _find_updatable(self, conn, entries):
+        """Mapear (categoria, arquivo) -> id do item existente que pode ser atualizado
+        
+        Só vale quando o par aparece uma única vez no lote e identifica um
+        único item anterior a esta importação que ainda não foi atualizado e
+        cujo conteúdo não aparece no arquivo (temp.incoming_hashes).
+        """
+        counts = {}
+        for entry in entries:
+            key = (entry['category_id'], entry['source_file'])
+            counts[key] = counts.get(key, 0) + 1
+        pairs = [list(key) for key, count in counts.items() if count == 1]
+        if not pairs:
+            return {}
+        
+        rows = conn.execute('''
+            SELECT MIN(id), category_id, source_file
+            FROM items
+            WHERE (category_id, source_file) IN (
+                SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]')
+                FROM json_each(?)
+            )
+            AND id < ?
+            GROUP BY category_id, source_file
+            HAVING COUNT(*) = 1
+               AND COALESCE(MIN(content_hash), '') NOT IN (SELECT hash FROM temp.incoming_hashes)
+        ''', (json.dumps(pairs), self._first_id)).fetchall()
+        
+        return {
+            (row[1], row[2]): row[0]
+            for row in rows
+            if row[0] not in self._updated_ids
+        }
+    
     def _get_or_create_category(self, conn, category_name):
-        """Criar categoria se não existir"""
+        """Criar categoria se não existir (com cache durante a importação)"""
+        if category_name in self._category_ids:
+            return self._category_ids[category_name]
+        
         # Verificar se existe
         result = conn.execute('SELECT id FROM categories WHERE name = ?', (category_name,)).fetchone()
         
         if result:
-            return result[0]
-        
-        # Criar nova categoria
-        cursor = conn.execute('INSERT INTO categories (name) VALUES (?)', (category_name,))
-        return cursor.lastrowid
-    
-    def _create_item(self, conn, category_id, item_data):
-        """Criar item no banco"""
-        cursor = conn.execute('''
-            INSERT INTO items (category_id, source_file, raw_content)
-            VALUES (?, ?, ?)
-        ''', (category_id, item_data.get('source_file', ''), item_data.get('raw_content', '')))
-        
-        return cursor.lastrowid
-    
-    def _process_extracted_info(self, conn, item_id, extracted_info):
-        """Processar informações extraídas"""
-        # Senhas
-        for password in extracted_info.get('possible_passwords', []):
-            conn.execute('INSERT INTO passwords (item_id, password) VALUES (?, ?)', (item_id, password))
-        
-        # Emails
-        for email in extracted_info.get('emails', []):
-            conn.execute('INSERT INTO emails (item_id, email) VALUES (?, ?)', (item_id, email))
-        
-        # URLs
-        for url in extracted_info.get('urls', []):
-            conn.execute('INSERT INTO urls (item_id, url) VALUES (?, ?)', (item_id, url))
-        
-        # Chaves privadas
-        for key in extracted_info.get('possible_private_keys', []):
-            conn.execute('INSERT INTO private_keys (item_id, key_value) VALUES (?, ?)', (item_id, key))
-        
-        # Seeds
-        for seed in extracted_info.get('possible_seed', []):
-            conn.execute('INSERT INTO seeds (item_id, seed_phrase) VALUES (?, ?)', (item_id, seed))
\ No newline at end of file
+            category_id = result[0]
+        else:
+            # Criar nova categoria
+            category_id = conn.execute('INSERT INTO categories (name) VALUES (?)', (category_name,)).lastrowid
+        
+        self._category_ids[category_name] = category_id
+        return category_id
+
+def save_job_progress(conn, progress):
+    """Gravar o progresso do job no banco para que qualquer processo o consulte"""
+    if not progress.job_id:
+        return
+    snapshot = progress.snapshot()
+    conn.execute('''
+        INSERT INTO import_jobs (job_id, status, snapshot, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (job_id) DO UPDATE SET
+            status = excluded.status,
+            snapshot = excluded.snapshot,
+            updated_at = excluded.updated_at
+    ''', (progress.job_id, snapshot['status'], json.dumps(snapshot), time.time()))
+    conn.commit()
+
+def _running_job_in_db():
+    """Id de um job em andamento em outro processo (ou None)"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute('''
+            SELECT job_id FROM import_jobs
+            WHERE status = 'running' AND updated_at > ?
+            ORDER BY updated_at DESC LIMIT 1
+        ''', (time.time() - STALE_JOB_SECONDS,)).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+def start_import_job(json_path):
+    """Iniciar importação em uma thread de fundo e retornar o id do job
+    
+    Só uma importação roda por vez (o SQLite tem um único escritor); se já
+    houver uma em andamento, neste ou em outro processo, o id dela é
+    retornado.
+    """
+    with _jobs_lock:
+        for job_id, progress in _jobs.items():
+            if progress.status == 'running':
+                return job_id
+        
+        running_id = _running_job_in_db()
+        if running_id:
+            return running_id
+        
+        job_id = uuid.uuid4().hex
+        progress = ImportProgress(os.path.getsize(json_path), job_id)
+        _jobs[job_id] = progress
+        
+        # Descartar os jobs finalizados mais antigos
+        finished = [key for key, job in _jobs.items() if job.status != 'running']
+        for key in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del _jobs[key]
+        
+        # Registrar o job antes de responder, para o polling de outros processos
+        conn = get_db_connection()
+        try:
+            save_job_progress(conn, progress)
+        finally:
+            conn.close()
+    
+    thread = threading.Thread(
+        target=_run_import_job,
+        args=(json_path, progress),
+        name=f'import-{job_id[:8]}',
+        daemon=True
+    )
+    thread.start()
+    return job_id
+
+def _run_import_job(json_path, progress):
+    """Executar a importação fora da requisição"""
+    try:
+        ImportService().import_from_json(json_path, progress)
+    except Exception as e:
+        # O erro já fica registrado no progresso do job
+        print(f"Erro na importação em segundo plano: {e}")
+
+def get_import_job(job_id):
+    """Estado atual de um job de importação (None se desconhecido)
+    
+    Jobs deste processo são lidos da memória; os demais, do banco.
+    """
+    with _jobs_lock:
+        progress = _jobs.get(job_id)
+    if progress is not None:
+        return dict(progress.snapshot(), job_id=job_id)
+    
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            'SELECT snapshot, updated_at FROM import_jobs WHERE job_id = ?', (job_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    
+    job = dict(json.loads(row['snapshot']), job_id=job_id)
+    if job['status'] == 'running' and row['updated_at'] < time.time() - STALE_JOB_SECONDS:
+        job['status'] = 'error'
+        job['error'] = 'Importação interrompida'
+    return job
@@ -0,0 +1,155 @@
+import json
+import time
+from core.cache import bump_data_version
+from core.compression import decompress_content
+from core.config import Config
+from core.db import get_db_connection
+from core.minhash import minhash_signature, lsh_buckets, similarity
+
+def delete_signatures(conn, item_ids):
+    """Apagar assinatura e buckets LSH dos itens (sem commit)"""
+    ids_json = json.dumps(list(item_ids))
+    conn.execute('DELETE FROM item_lsh WHERE item_id IN (SELECT value FROM json_each(?))', (ids_json,))
+    conn.execute('DELETE FROM item_signatures WHERE item_id IN (SELECT value FROM json_each(?))', (ids_json,))
+
+def replace_signatures(conn, contents):
+    """Regravar assinatura MinHash e buckets LSH de vários itens: {item_id: texto}
+    
+    Não faz commit; roda dentro da transação do chamador. Itens sem
+    palavras ficam sem assinatura. Retorna a quantidade de assinaturas.
+    """
+    if not contents:
+        return 0
+    delete_signatures(conn, contents)
+    
+    signatures = []
+    buckets = []
+    for item_id, text in contents.items():
+        signature = minhash_signature(text)
+        if signature is None:
+            continue
+        signatures.append((item_id, signature))
+        buckets += [(bucket, item_id) for bucket in lsh_buckets(signature)]
+    
+    conn.executemany('INSERT INTO item_signatures (item_id, signature) VALUES (?, ?)', signatures)
+    conn.executemany('INSERT OR IGNORE INTO item_lsh (bucket, item_id) VALUES (?, ?)', buckets)
+    return len(signatures)
+
+class SimilarityService:
+    """Assinaturas MinHash dos itens e agrupamento de itens parecidos"""
+    
+    def __init__(self, batch_size=None, threshold=None):
+        self.batch_size = batch_size or Config.EXTRACTION_BATCH_SIZE
+        self.threshold = threshold or Config.SIMILARITY_THRESHOLD
+    
+    def backfill(self, only_missing=True, progress=None):
+        """Calcular as assinaturas de todos os itens (ou só dos que não têm)
+        
+        Os itens são lidos por id em blocos, cada um gravado em uma
+        transação própria. progress(items) é chamado após cada bloco.
+        """
+        conn = get_db_connection()
+        start = time.perf_counter()
+        items = 0
+        
+        sql = 'SELECT ic.item_id, ic.codec, ic.data FROM item_contents ic WHERE ic.item_id > ?'
+        if only_missing:
+            sql += ' AND NOT EXISTS (SELECT 1 FROM item_signatures WHERE item_id = ic.item_id)'
+        sql += ' ORDER BY ic.item_id LIMIT ?'
+        
+        try:
+            last_id = 0
+            while True:
+                rows = conn.execute(sql, (last_id, self.batch_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    replace_signatures(conn, {
+                        item_id: decompress_content(codec, data) for item_id, codec, data in rows
+                    })
+                    bump_data_version(conn)
+                    conn.commit()
+                except:
+                    conn.rollback()
+                    raise
+                items += len(rows)
+                if progress:
+                    progress(items)
+        finally:
+            conn.close()
+        
+        elapsed = time.perf_counter() - start
+        return {
+            'items': items,
+            'seconds': round(elapsed, 2),
+            'items_per_second': round(items / elapsed, 1) if elapsed else 0.0,
+        }
+    
+    def rebuild_groups(self):
+        """Recalcular similar_groups a partir dos buckets LSH
+        
+        Os buckets com mais de um item são percorridos em ordem de bucket; o
+        menor id do bucket é o líder, e cada item ainda sem grupo entra no
+        grupo do líder se a assinatura passar do limite contra a do item de
+        referência do grupo (group_id, o menor id do grupo). Assim todo item
+        fica parecido com a referência do grupo (sem cadeias de itens cada
+        vez mais diferentes), e o custo é proporcional às linhas dos buckets
+        repetidos, sem comparar todos os pares de itens. Retorna a
+        quantidade de grupos e de itens agrupados.
+        """
+        conn = get_db_connection()
+        members = {}
+        root_signatures = {}
+        
+        try:
+            rows = conn.execute('''
+                SELECT l.bucket, l.item_id, s.signature
+                FROM item_lsh l
+                JOIN item_signatures s ON s.item_id = l.item_id
+                WHERE l.bucket IN (SELECT bucket FROM item_lsh GROUP BY bucket HAVING COUNT(*) > 1)
+                ORDER BY l.bucket, l.item_id
+            ''')
+            current = None
+            for bucket, item_id, signature in rows:
+                if bucket != current:
+                    current = bucket
+                    leader_id, leader_signature = item_id, signature
+                    continue
+                if item_id in members or item_id in root_signatures:
+                    continue
+                # O líder tem o menor id do bucket e só entram itens de id maior
+                # que o líder (que é a referência ou já pertence ao grupo dela):
+                # a referência é sempre o menor id do grupo, em qualquer ordem
+                # de buckets
+                root_id = members.get(leader_id, leader_id)
+                root_signature = root_signatures.get(root_id, leader_signature)
+                if similarity(signature, root_signature) >= self.threshold:
+                    members[item_id] = root_id
+                    root_signatures[root_id] = root_signature
+            
+            for root_id in root_signatures:
+                members[root_id] = root_id
+            
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DELETE FROM similar_groups')
+                conn.executemany(
+                    'INSERT INTO similar_groups (item_id, group_id) VALUES (?, ?)',
+                    members.items()
+                )
+                conn.execute('''
+                    INSERT INTO app_settings (name, value) VALUES ('similar_groups_built_at', datetime('now'))
+                    ON CONFLICT (name) DO UPDATE SET value = excluded.value
+                ''')
+                bump_data_version(conn)
+                conn.commit()
+            except:
+                conn.rollback()
+                raise
+        finally:
+            conn.close()
+        
+        return {'groups': len(root_signatures), 'items': len(members)}
@@ -0,0 +1,36 @@
+import json
+import pytest
+import core.db
+from core.cache import data_cache
+from core.config import Config
+from core.db import init_db, reset_pool
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Banco novo e migrado em um diretório temporário"""
+    monkeypatch.setattr(Config, 'DATABASE_PATH', str(tmp_path / 'app.db'))
+    reset_pool()
+    data_cache.clear()
+    init_db()
+    monkeypatch.setattr(core.db, '_schema_ready', True)
+    yield tmp_path
+    reset_pool()
+
+@pytest.fixture
+def client(db):
+    """Cliente de teste da aplicação já autenticado"""
+    from app import app
+    app.config['TESTING'] = True
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['authenticated'] = True
+    return client
+
+@pytest.fixture
+def write_json(tmp_path):
+    """Gravar um JSON de importação ({categoria: [itens]}) e retornar o caminho"""
+    def write(name, categories):
+        path = tmp_path / name
+        path.write_text(json.dumps({'categories': categories}), encoding='utf-8')
+        return str(path)
+    return write
@@ -0,0 +1,64 @@
+from core.db import get_db_connection, verify_counters
+from services.data_service import DataService
+from services.import_service import ImportService
+
+def create(source_file, raw_content, category_name='cat'):
+    assert DataService().create_item({
+        'source_file': source_file, 'raw_content': raw_content, 'category_name': category_name
+    })
+
+def item_ids():
+    conn = get_db_connection()
+    try:
+        return [row[0] for row in conn.execute('SELECT id FROM items ORDER BY id')]
+    finally:
+        conn.close()
+
+def counter_mismatches():
+    conn = get_db_connection()
+    try:
+        return verify_counters(conn)
+    finally:
+        conn.close()
+
+def test_remove_duplicates_keeps_lowest_id(db):
+    create('a.txt', 'Senha: abc123\nfulano@exemplo.com')
+    create('a.txt', 'Senha: abc123\nfulano@exemplo.com')
+    create('a.txt', 'Senha: abc123\nfulano@exemplo.com')
+    create('a.txt', 'outro conteúdo')
+    create('b.txt', 'Senha: abc123\nfulano@exemplo.com')
+    
+    result = DataService().remove_duplicates(dry_run=True)
+    assert (result['groups'], result['items_removed'], result['dry_run']) == (1, 2, True)
+    assert item_ids() == [1, 2, 3, 4, 5]
+    
+    result = DataService().remove_duplicates()
+    assert (result['groups'], result['items_removed'], result['dry_run']) == (1, 2, False)
+    assert item_ids() == [1, 4, 5]
+    item = DataService().get_item_by_id(1)
+    assert item['passwords'] == ['abc123']
+    assert item['emails'] == ['fulano@exemplo.com']
+    assert counter_mismatches() == []
+    
+    assert DataService().remove_duplicates()['items_removed'] == 0
+
+def test_counters_follow_import_edit_and_delete(db, write_json):
+    ImportService().import_from_json(write_json('dados.json', {
+        'redes': [
+            {'source_file': f'conta{i}.txt', 'raw_content': f'Senha: senha{i % 3}\nuser{i}@exemplo.com https://login.site{i % 2}.com/'}
+            for i in range(10)
+        ],
+    }))
+    assert counter_mismatches() == []
+    
+    ds = DataService()
+    ids = item_ids()
+    assert ds.update_item(ids[0], {'source_file': 'conta0.txt', 'raw_content': 'Senha: nova\nhttps://outro.com.br/x'})
+    assert ds.move_items(ids[1:3], 'bancos') == 2
+    assert counter_mismatches() == []
+    
+    assert ds.delete_items(ids[3:6]) == 3
+    assert counter_mismatches() == []
+    stats = ds.get_dashboard_stats()
+    assert stats['total_items'] == 7
+    assert {c['name']: c['count'] for c in stats['categories']} == {'redes': 5, 'bancos': 2}
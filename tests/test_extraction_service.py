@@ -0,0 +1,73 @@
+from core.db import get_db_connection, verify_counters
+from services.data_service import DataService
+from services.extraction_service import ExtractionService
+from services.import_service import ImportService
+
+def item_emails(source_file):
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT v.value, e.source
+            FROM items i
+            JOIN emails e ON e.item_id = i.id
+            JOIN entity_values v ON v.id = e.value_id
+            WHERE i.source_file = ?
+        ''', (source_file,)).fetchall()
+        return sorted(tuple(row) for row in rows)
+    finally:
+        conn.close()
+
+def item_id(source_file):
+    conn = get_db_connection()
+    try:
+        return conn.execute('SELECT id FROM items WHERE source_file = ?', (source_file,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def test_imported_values_survive_edit_and_reextraction(db, write_json):
+    ImportService().import_from_json(write_json('itens.json', {'cat': [
+        {
+            'source_file': 'importado.txt',
+            'raw_content': 'contato ana@exemplo.com',
+            'extracted_info': {'emails': ['lista@exemplo.com']},
+        },
+        {'source_file': 'regex.txt', 'raw_content': 'contato bob@exemplo.com'},
+    ]}))
+    assert item_emails('importado.txt') == [('lista@exemplo.com', 'import')]
+    assert item_emails('regex.txt') == [('bob@exemplo.com', 'regex')]
+    
+    ds = DataService()
+    ds.update_item(item_id('importado.txt'), {
+        'source_file': 'importado.txt',
+        'raw_content': 'contato carla@exemplo.com lista@exemplo.com',
+    })
+    ds.update_item(item_id('regex.txt'), {'source_file': 'regex.txt', 'raw_content': 'contato dan@exemplo.com'})
+    # O valor do import fica e não é repetido pela extração do conteúdo
+    assert item_emails('importado.txt') == [('carla@exemplo.com', 'regex'), ('lista@exemplo.com', 'import')]
+    assert item_emails('regex.txt') == [('dan@exemplo.com', 'regex')]
+    
+    # --all não reprocessa itens com dados do import
+    totals = ExtractionService(workers=1).backfill(only_missing=False)
+    assert totals['items'] == 1
+    assert item_emails('importado.txt') == [('carla@exemplo.com', 'regex'), ('lista@exemplo.com', 'import')]
+    assert item_emails('regex.txt') == [('dan@exemplo.com', 'regex')]
+    
+    conn = get_db_connection()
+    try:
+        assert verify_counters(conn) == []
+    finally:
+        conn.close()
+
+def test_remove_duplicates_keeps_imported_link(db):
+    ds = DataService()
+    for _ in range(2):
+        assert ds.create_item({'source_file': 'a.txt', 'raw_content': 'contato ana@exemplo.com', 'category_name': 'cat'})
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE emails SET source = 'import' WHERE item_id = 2")
+        conn.commit()
+    finally:
+        conn.close()
+    
+    assert ds.remove_duplicates()['items_removed'] == 1
+    assert item_emails('a.txt') == [('ana@exemplo.com', 'import')]
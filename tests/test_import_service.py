@@ -0,0 +1,55 @@
+from core.db import get_db_connection
+from services.import_service import ImportService
+
+def stored_contents(source_file):
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT item_content(ic.codec, ic.data)
+            FROM items i JOIN item_contents ic ON ic.item_id = i.id
+            WHERE i.source_file = ?
+        ''', (source_file,)).fetchall()
+        return sorted(row[0] for row in rows)
+    finally:
+        conn.close()
+
+def test_unchanged_item_is_not_overwritten_by_new_item_with_same_source(db, write_json):
+    x = {'source_file': 'a.txt', 'raw_content': 'conteudo x', 'extracted_info': {}}
+    y = {'source_file': 'a.txt', 'raw_content': 'conteudo y', 'extracted_info': {}}
+    
+    ImportService().import_from_json(write_json('x.json', {'cat': [x]}))
+    result = ImportService().import_from_json(write_json('xy.json', {'cat': [x, y]}))
+    
+    assert result['imported'] == 1
+    assert result['updated'] == 0
+    assert stored_contents('a.txt') == ['conteudo x', 'conteudo y']
+    
+    # Repetir a importação não muda nada
+    result = ImportService().import_from_json(write_json('xy.json', {'cat': [x, y]}))
+    assert (result['imported'], result['updated'], result['skipped']) == (0, 0, 2)
+    assert stored_contents('a.txt') == ['conteudo x', 'conteudo y']
+
+def test_unchanged_item_is_not_overwritten_from_an_earlier_batch(db, write_json):
+    x = {'source_file': 'a.txt', 'raw_content': 'conteudo x', 'extracted_info': {}}
+    y = {'source_file': 'a.txt', 'raw_content': 'conteudo y', 'extracted_info': {}}
+    
+    ImportService().import_from_json(write_json('x.json', {'cat': [x]}))
+    # Com um item por lote, Y é gravado antes de X ser lido
+    result = ImportService(batch_size=1).import_from_json(write_json('yx.json', {'cat': [y, x]}))
+    
+    assert (result['imported'], result['updated'], result['skipped']) == (1, 0, 1)
+    assert stored_contents('a.txt') == ['conteudo x', 'conteudo y']
+    
+    result = ImportService(batch_size=1).import_from_json(write_json('yx.json', {'cat': [y, x]}))
+    assert (result['imported'], result['updated'], result['skipped']) == (0, 0, 2)
+    assert stored_contents('a.txt') == ['conteudo x', 'conteudo y']
+
+def test_changed_item_is_updated_in_place(db, write_json):
+    x = {'source_file': 'a.txt', 'raw_content': 'conteudo x', 'extracted_info': {}}
+    x2 = {'source_file': 'a.txt', 'raw_content': 'conteudo x alterado', 'extracted_info': {}}
+    
+    ImportService().import_from_json(write_json('x.json', {'cat': [x]}))
+    result = ImportService().import_from_json(write_json('x2.json', {'cat': [x2]}))
+    
+    assert result['updated'] == 1
+    assert stored_contents('a.txt') == ['conteudo x alterado']
@@ -0,0 +1,90 @@
+import sqlite3
+from core.cache import data_cache
+from core.config import Config
+from core.db import MIGRATIONS, get_db_connection, init_db, reset_pool, verify_counters
+from services.data_service import DataService
+
+# Schema do banco antes das migrações (sem user_version)
+BASELINE_SCHEMA = '''
+    CREATE TABLE categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category_id INTEGER,
+        source_file TEXT NOT NULL,
+        raw_content TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (category_id) REFERENCES categories (id)
+    );
+    CREATE TABLE passwords (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id INTEGER,
+        password TEXT NOT NULL,
+        type TEXT DEFAULT 'password',
+        FOREIGN KEY (item_id) REFERENCES items (id)
+    );
+    CREATE TABLE emails (id INTEGER PRIMARY KEY AUTOINCREMENT, item_id INTEGER, email TEXT NOT NULL,
+                         FOREIGN KEY (item_id) REFERENCES items (id));
+    CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, item_id INTEGER, url TEXT NOT NULL,
+                       FOREIGN KEY (item_id) REFERENCES items (id));
+    CREATE TABLE private_keys (id INTEGER PRIMARY KEY AUTOINCREMENT, item_id INTEGER, key_value TEXT NOT NULL,
+                               FOREIGN KEY (item_id) REFERENCES items (id));
+    CREATE TABLE seeds (id INTEGER PRIMARY KEY AUTOINCREMENT, item_id INTEGER, seed_phrase TEXT NOT NULL,
+                        FOREIGN KEY (item_id) REFERENCES items (id));
+    CREATE INDEX idx_items_category ON items(category_id);
+    CREATE INDEX idx_passwords_item ON passwords(item_id);
+    CREATE INDEX idx_emails_item ON emails(item_id);
+'''
+
+def create_baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany('INSERT INTO categories (id, name) VALUES (?, ?)', [(1, 'redes'), (2, 'bancos')])
+    conn.executemany('INSERT INTO items (id, category_id, source_file, raw_content) VALUES (?, ?, ?, ?)', [
+        (1, 1, 'facebook.txt', 'Senha: girassol\nhttps://www.facebook.com/login'),
+        (2, 1, 'facebook.txt', 'Senha: girassol\nhttps://www.facebook.com/login'),
+        (3, 2, 'banco.txt', 'agência 123 fulano@exemplo.com'),
+    ])
+    conn.executemany('INSERT INTO passwords (item_id, password) VALUES (?, ?)', [(1, 'girassol'), (2, 'girassol'), (99, 'orfa')])
+    conn.executemany('INSERT INTO emails (item_id, email) VALUES (?, ?)', [(3, 'fulano@exemplo.com'), (98, 'orfao@exemplo.com')])
+    conn.executemany('INSERT INTO urls (item_id, url) VALUES (?, ?)', [(1, 'https://www.facebook.com/login'), (97, 'https://orfa.com')])
+    conn.execute("INSERT INTO seeds (item_id, seed_phrase) VALUES (96, 'abc def')")
+    conn.commit()
+    conn.close()
+
+def test_migrate_baseline_database(tmp_path, monkeypatch):
+    path = tmp_path / 'app.db'
+    create_baseline_db(path)
+    monkeypatch.setattr(Config, 'DATABASE_PATH', str(path))
+    reset_pool()
+    data_cache.clear()
+    
+    assert init_db() == list(range(1, len(MIGRATIONS) + 1))
+    assert init_db() == []
+    
+    conn = get_db_connection()
+    try:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == len(MIGRATIONS) == 9
+        assert conn.execute('PRAGMA foreign_key_check').fetchall() == []
+        assert verify_counters(conn) == []
+        # Dados extraídos de itens inexistentes são descartados
+        for table in ('passwords', 'emails', 'urls', 'private_keys', 'seeds'):
+            assert conn.execute(f'SELECT COUNT(*) FROM {table} WHERE item_id NOT IN (SELECT id FROM items)').fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM entity_values WHERE value LIKE '%orf%'").fetchone()[0] == 0
+    finally:
+        conn.close()
+    
+    ds = DataService()
+    item = ds.get_item_by_id(1)
+    assert item['raw_content'] == 'Senha: girassol\nhttps://www.facebook.com/login'
+    assert item['passwords'] == ['girassol']
+    assert item['urls'] == ['https://www.facebook.com/login']
+    assert ds.get_item_by_id(3)['emails'] == ['fulano@exemplo.com']
+    stats = ds.get_dashboard_stats()
+    assert (stats['total_items'], stats['total_passwords'], stats['total_emails']) == (3, 2, 1)
+    assert [item['id'] for item in ds.search_items('girassol')['items']] == [1, 2]
+    reset_pool()
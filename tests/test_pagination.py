@@ -0,0 +1,30 @@
+import pytest
+from core.utils import encode_cursor, decode_cursor
+from services.data_service import DataService
+
+def test_decode_cursor_round_trip():
+    assert decode_cursor(encode_cursor('a.txt', 3), 2) == ['a.txt', 3]
+    assert decode_cursor(encode_cursor(None, 1.5)) == [None, 1.5]
+
+@pytest.mark.parametrize('values', [
+    [['a'], 1],
+    [{'a': 1}, 1],
+    ['a.txt'],
+])
+def test_decode_cursor_rejects_tampered_values(values):
+    assert decode_cursor(encode_cursor(*values), 2) is None
+
+def test_decode_cursor_rejects_garbage():
+    assert decode_cursor('!!!', 2) is None
+    assert decode_cursor(encode_cursor('x')[:-1] + '{', 1) is None
+
+def test_tampered_cursor_falls_back_to_first_page(client):
+    for i in range(3):
+        DataService().create_item({'source_file': f'f{i}.txt', 'raw_content': f'item {i}', 'category_name': 'cat'})
+    cursor = encode_cursor(['a'], {'b': 1})
+    
+    response = client.get(f'/category/cat?after={cursor}')
+    assert response.status_code == 200
+    assert b'f0.txt' in response.data
+    assert client.get(f'/reports/password-reuse?after={cursor}').status_code == 200
+    assert client.get(f'/api/items?after={cursor}').status_code == 200
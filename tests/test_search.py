@@ -0,0 +1,60 @@
+import pytest
+from core.db import get_db_connection
+from services.data_service import DataService
+from services.import_service import ImportService
+
+@pytest.fixture
+def imported(db, write_json):
+    ImportService().import_from_json(write_json('dados.json', {
+        'redes': [
+            {'source_file': 'facebook.txt', 'raw_content': 'conta principal\nSenha: girassol42'},
+            {'source_file': 'twitter.txt', 'raw_content': 'perfil secundário maria@exemplo.com'},
+        ],
+        'bancos': [
+            {'source_file': 'banco.txt', 'raw_content': 'agência e conta corrente'},
+        ],
+    }))
+    return {item['source_file']: item['id'] for item in DataService().list_items()['items']}
+
+def found(query):
+    return sorted(item['source_file'] for item in DataService().search_items(query)['items'])
+
+def assert_fts_integrity():
+    """integrity-check com rank = 1 também compara o índice com o conteúdo externo"""
+    conn = get_db_connection()
+    try:
+        conn.execute("INSERT INTO items_fts (items_fts) VALUES ('integrity-check')")
+        conn.execute("INSERT INTO items_fts (items_fts, rank) VALUES ('integrity-check', 1)")
+    finally:
+        conn.close()
+
+def test_search_after_import(imported):
+    assert found('conta') == ['banco.txt', 'facebook.txt']
+    assert found('secundario') == ['twitter.txt']  # sem acento também casa
+    assert found('twitter') == ['twitter.txt']  # nome do arquivo
+    assert found('email:maria@exemplo.com') == ['twitter.txt']
+    assert found('"conta corrente"') == ['banco.txt']
+    assert_fts_integrity()
+
+def test_search_follows_edits(imported):
+    ds = DataService()
+    assert ds.update_item(imported['banco.txt'], {'source_file': 'poupanca.txt', 'raw_content': 'investimentos diversos'})
+    assert found('conta') == ['facebook.txt']
+    assert found('investimentos') == ['poupanca.txt']
+    assert found('poupanca') == ['poupanca.txt']
+    assert found('banco') == []
+    
+    # Só o nome do arquivo muda (trigger em items) e só o conteúdo muda (trigger em item_contents)
+    assert ds.update_item(imported['twitter.txt'], {'source_file': 'x.txt', 'raw_content': 'perfil secundário maria@exemplo.com'})
+    assert found('twitter') == []
+    assert found('perfil') == ['x.txt']
+    assert ds.update_item(imported['facebook.txt'], {'source_file': 'facebook.txt', 'raw_content': 'sem senha agora'})
+    assert found('girassol42') == []
+    assert found('agora') == ['facebook.txt']
+    assert_fts_integrity()
+
+def test_search_after_delete(imported):
+    assert DataService().delete_items([imported['banco.txt'], imported['twitter.txt']]) == 2
+    assert found('conta') == ['facebook.txt']
+    assert found('perfil') == []
+    assert_fts_integrity()
@@ -0,0 +1,64 @@
+from core.config import Config
+from core.db import get_db_connection
+from core.minhash import similarity
+from services.data_service import DataService
+from services.similarity_service import SimilarityService
+
+def line(number, tag):
+    return ' '.join(f'{tag}{word}{number}' for word in ('linha', 'alfa', 'beta', 'gama', 'delta'))
+
+def text(changes):
+    """40 linhas; changes = {número da linha: marcador} troca as palavras dessas linhas"""
+    return '\n'.join(line(number, changes.get(number, 'x')) for number in range(40))
+
+# B difere de A em 2 linhas e C difere de B em mais 3: A~B ~0,91, B~C ~0,84, A~C ~0,78
+A = text({})
+B = text({0: 'b', 1: 'b'})
+C = text({0: 'b', 1: 'b', 2: 'c', 3: 'c', 4: 'c'})
+D = text({number: 'z' for number in range(40)})
+
+def create_items(*contents):
+    ds = DataService()
+    for number, content in enumerate(contents):
+        assert ds.create_item({'source_file': f'{number}.txt', 'raw_content': content, 'category_name': 'cat'})
+
+def groups():
+    conn = get_db_connection()
+    try:
+        return dict(conn.execute('SELECT item_id, group_id FROM similar_groups').fetchall())
+    finally:
+        conn.close()
+
+def test_group_id_is_smallest_item_id(db):
+    # Ids fora da ordem de parecença: D=1, C=2, B=3, A=4 e 5
+    create_items(D, C, B, A, A)
+    
+    result = SimilarityService(threshold=0.7).rebuild_groups()
+    members = groups()
+    assert result == {'groups': len(set(members.values())), 'items': len(members)}
+    assert result['groups'] >= 1 and 1 not in members
+    
+    conn = get_db_connection()
+    try:
+        signatures = dict(conn.execute('SELECT item_id, signature FROM item_signatures').fetchall())
+    finally:
+        conn.close()
+    for item_id, group_id in members.items():
+        assert group_id == min(i for i, g in members.items() if g == group_id)
+        assert similarity(signatures[item_id], signatures[group_id]) >= 0.7
+
+def test_items_must_pass_threshold_against_group_reference(db, monkeypatch):
+    create_items(A, B, C, D)
+    
+    # C passa do limite contra B, mas não contra A (a referência do grupo)
+    assert SimilarityService(threshold=0.82).rebuild_groups() == {'groups': 1, 'items': 2}
+    assert groups() == {1: 1, 2: 1}
+    
+    assert SimilarityService(threshold=0.95).rebuild_groups() == {'groups': 0, 'items': 0}
+    assert groups() == {}
+    
+    monkeypatch.setattr(Config, 'SIMILARITY_THRESHOLD', 0.82)
+    ds = DataService()
+    assert [item['id'] for item in ds.get_similar_items(1)] == [2]
+    assert [item['id'] for item in ds.get_similar_items(2)] == [1, 3]
+    assert ds.get_similar_items(4) == []